@@ -11,27 +11,28 @@ PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if PROJECT_DIR not in sys.path:
     sys.path.insert(0, PROJECT_DIR)
 
-def run_etl():
+# Only the plain constants of pipeline_layout are imported here, so parsing the DAG
+# does not load pandas, pyarrow or the database drivers; run_task imports the rest.
+from scripts.pipeline_layout import MART_SOURCES, SOURCE_TABLES, SUMMARY_SOURCES
+
+def run_task(step, **context):
     """
-    This function imports and runs the ETL process.
-    It calls your extract, transform, and load functions.
+    Runs one step of scripts/pipeline_tasks.py for this DAG run.
+    Intermediate results are handed between tasks as Parquet files in the run's
+    work directory. Per-stage metrics are logged as JSON, written to
+    metrics/<run_id>.<task_id>.json and pushed to XCom under the "etl_metrics" key.
     """
-    from scripts.extract_data import extract_all_data
-    from scripts.transform_data import transform_all
-    from scripts.load_to_postgres import load_to_postgres
-
-    # Extract
-    customers, sales, products, payments, marketing_ads, customer_support = extract_all_data()
-
-    # Transform
-    sales_mart, marketing_mart, support_mart = transform_all(
-        customers, sales, products, payments, marketing_ads, customer_support
-    )
+    from scripts import pipeline_tasks
+    from scripts.metrics import RunMetrics
 
-    # Load to PostgreSQL (ensure your db_url is set properly in load_to_postgres.py)
-    load_to_postgres(sales_mart, "sales_mart")
-    load_to_postgres(marketing_mart, "marketing_mart")
-    load_to_postgres(support_mart, "support_mart")
+    work_dir = pipeline_tasks.run_work_dir(context["run_id"])
+    metrics = RunMetrics(run_id=f"{context['run_id']}.{context['ti'].task_id}")
+    try:
+        with metrics:
+            return getattr(pipeline_tasks, step)(work_dir=work_dir, **context["params"])
+    finally:
+        # Pushed even when a stage fails, so the failing stage is visible in the UI
+        metrics.push_to_xcom(context["ti"])
 
 # Default arguments for the DAG
 default_args = {
@@ -53,11 +54,59 @@ dag = DAG(
     schedule_interval=timedelta(days=1),
 )
 
-# Define the Python task
-etl_task = PythonOperator(
-    task_id='run_etl',
-    python_callable=run_etl,
+# Define the tasks: extract + clean each source in parallel, then build and load each
+# mart as soon as its own sources are ready, then aggregate its summary marts from it.
+# A retry only repeats the failed task.
+
+clean_tasks = {
+    table_name: PythonOperator(
+        task_id=f'extract_clean_{table_name}',
+        python_callable=run_task,
+        op_kwargs={'step': 'extract_clean'},
+        params={'table_name': table_name},
+        dag=dag,
+    )
+    for table_name in SOURCE_TABLES
+}
+
+cleanup_task = PythonOperator(
+    task_id='cleanup_work_dir',
+    python_callable=run_task,
+    op_kwargs={'step': 'cleanup'},
     dag=dag,
 )
 
-etl_task
+build_tasks = {}
+for mart_name, sources in MART_SOURCES.items():
+    build_task = build_tasks[mart_name] = PythonOperator(
+        task_id=f'build_{mart_name}',
+        python_callable=run_task,
+        op_kwargs={'step': 'build_mart'},
+        params={'mart_name': mart_name},
+        dag=dag,
+    )
+    load_task = PythonOperator(
+        task_id=f'load_{mart_name}',
+        python_callable=run_task,
+        op_kwargs={'step': 'load_mart'},
+        params={'mart_name': mart_name},
+        dag=dag,
+    )
+    [clean_tasks[table_name] for table_name in sources] >> build_task >> load_task >> cleanup_task
+
+for summary_name, mart_name in SUMMARY_SOURCES.items():
+    summary_task = PythonOperator(
+        task_id=f'build_{summary_name}',
+        python_callable=run_task,
+        op_kwargs={'step': 'build_summary'},
+        params={'summary_name': summary_name},
+        dag=dag,
+    )
+    load_task = PythonOperator(
+        task_id=f'load_{summary_name}',
+        python_callable=run_task,
+        op_kwargs={'step': 'load_mart'},
+        params={'mart_name': summary_name},
+        dag=dag,
+    )
+    build_tasks[mart_name] >> summary_task >> load_task >> cleanup_task
@@ -1,19 +1,19 @@
-import pandas as pd
-import numpy as np
-import random
-from datetime import datetime, timedelta
-import re
-from faker import Faker
+import argparse
 import os
+from datetime import datetime, timedelta
+
+import io
 
-# Initialize Faker
-fake = Faker()
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from faker import Faker
 
-# --- Configuration for Big Data Generation ---
+# --- Default Sizes for Big Data Generation ---
 num_customers = 100000       # 100K customers
 num_products = 1000          # 1K products
-num_sales = 1000000          # 2M sales transactions
-num_payments = num_sales     # 2M payment records (1:1 with sales)
+num_sales = 1000000          # 1M sales transactions
 num_ads = 10000              # 10K marketing ads records
 num_tickets = 5000           # 5K customer support records
 
@@ -21,219 +21,262 @@ num_tickets = 5000           # 5K customer support records
 missing_prob = 0.05   # 5% chance to insert a missing value in a field
 duplicate_prob = 0.05 # 5% of rows will be duplicated later
 
-# --- Helper Functions ---
-def maybe_missing(value):
-    """Return np.nan with probability missing_prob."""
-    return np.nan if random.random() < missing_prob else value
+# Rows generated and written per chunk, so memory stays flat for 10M+ row tables
+chunk_size = 500000
 
-def add_duplicates(df, duplicate_frac):
-    """Append duplicates of a random fraction of rows to the dataframe."""
-    n_dup = int(len(df) * duplicate_frac)
-    if n_dup > 0:
-        dup_rows = df.sample(n=n_dup, random_state=42)
-        df = pd.concat([df, dup_rows], ignore_index=True)
-    return df
-
-def generate_email_from_name(name):
-    """Generate an email using the customer name followed by '@gmail.com'.
-       Remove non-alphanumeric characters and convert to lower case."""
-    username = re.sub(r'\W+', '', name).lower()
-    return f"{username}@gmail.com"
+# Faker is slow per call, so names and catch phrases are drawn from a pre-built pool
+faker_pool_size = 10000
 
-def generate_phone():
-    """Generate a phone number starting with 0 following the pattern '0XXX XXX XX' (9 digits total)."""
-    digits = ''.join(random.choices("0123456789", k=8))
-    return f"0{digits[:3]} {digits[3:6]} {digits[6:]}"
-
-def random_date(start, end):
-    """Generate a random date between start and end (as a date object)."""
-    delta = end - start
-    random_days = random.randint(0, delta.days)
-    return (start + timedelta(days=random_days)).date()
-
-# --- New Product Generation Settings ---
 adjectives = ["Super", "Ultra", "Mega", "Fashion", "Elegant", "Modern", "Classic", "Stylish", "Premium", "Affordable"]
 product_types = [
-    "Skincare", "Bag", "Kitchenware", "Clothes", "Beauty", "Shoes", "Food", 
+    "Skincare", "Bag", "Kitchenware", "Clothes", "Beauty", "Shoes", "Food",
     "Cosmetics", "Accessories", "Furniture", "Toys", "Groceries", "Snacks"
 ]
-
-# --- Data Generation ---
-
-# 1. Generate Customers Data
-print("Generating Customers...")
-customers_list = []
-signup_start = datetime.today() - timedelta(days=730)  # 2 years ago
-signup_end = datetime.today()
-last_active_start = datetime.today() - timedelta(days=180)  # 6 months ago
-last_active_end = datetime.today()
-churn_threshold = datetime.today() - timedelta(days=90)
-
-for i in range(1, num_customers + 1):
-    cust_id = f"C{i:05d}"  # e.g., C00001
-    name = maybe_missing(fake.name())
-    gender = random.choice(["Male", "Female", "Other"])
-    email = maybe_missing(generate_email_from_name(name)) if pd.notnull(name) else np.nan
-    phone = maybe_missing(generate_phone())
-    signup_date = maybe_missing(random_date(signup_start, signup_end))
-    last_active_date = maybe_missing(random_date(last_active_start, last_active_end))
-    location = maybe_missing(f"City_{random.randint(1,100)}")
-    if pd.isna(last_active_date):
-        churn_status = np.nan
-    else:
-        churn_status = "Active" if datetime.combine(last_active_date, datetime.min.time()) >= churn_threshold else "Churned"
-    
-    customers_list.append([cust_id, name, gender, email, phone, signup_date, last_active_date, location, churn_status])
-
-df_customers = pd.DataFrame(customers_list, 
-    columns=["customer_id", "name", "gender", "email", "phone_number", "signup_date", "last_active_date", "location", "churn_status"])
-df_customers = add_duplicates(df_customers, duplicate_prob)
-df_customers.to_csv("customers.csv", index=False)
-print("Customers generated and saved to 'customers.csv'.")
-
-# 2. Generate Products Data
-print("Generating Products...")
-products_list = []
-
-for i in range(1, num_products + 1):
-    prod_id = f"P{i:04d}"  # e.g., P0001
-    prod_name = maybe_missing(f"{random.choice(adjectives)} {random.choice(product_types)}")
-    category = maybe_missing(random.choice(product_types))
-    price = maybe_missing(round(random.uniform(5, 1000), 2))
-    stock_quantity = maybe_missing(random.randint(10, 500))
-    supplier = maybe_missing(f"Supplier_{random.randint(1,50)}")
-    rating = maybe_missing(round(random.uniform(3.0, 5.0), 1))
-    reviews_count = maybe_missing(random.randint(5, 500))
-    
-    products_list.append([prod_id, prod_name, category, price, stock_quantity, supplier, rating, reviews_count])
-
-df_products = pd.DataFrame(products_list, 
-    columns=["product_id", "name", "category", "price", "stock_quantity", "supplier", "rating", "reviews_count"])
-df_products = add_duplicates(df_products, duplicate_prob)
-df_products.to_csv("products.csv", index=False)
-print("Products generated and saved to 'products.csv'.")
-
-# 3. Generate Sales Transactions Data
-print("Generating Sales Transactions...")
-sales_list = []
-order_date_start = datetime.today() - timedelta(days=365)  # 1 year ago
-order_date_end = datetime.today()
-
-for i in range(1, num_sales + 1):
-    order_id = f"R{i:07d}"  # e.g., R0000001
-    customer_id = maybe_missing(random.choice(df_customers["customer_id"].tolist()))
-    product_id = maybe_missing(random.choice(df_products["product_id"].tolist()))
-    order_date = maybe_missing(random_date(order_date_start, order_date_end))
-    total_amount = maybe_missing(round(random.uniform(10, 2000), 2))
-    payment_id_placeholder = maybe_missing(f"PY{random.randint(1, num_sales):06d}")
-    
-    sales_list.append([order_id, customer_id, product_id, order_date, total_amount, payment_id_placeholder])
-
-df_sales = pd.DataFrame(sales_list, 
-    columns=["order_id", "customer_id", "product_id", "order_date", "total_amount", "payment_id"])
-df_sales = add_duplicates(df_sales, duplicate_prob)
-df_sales.to_csv("sales_transactions.csv", index=False)
-print("Sales Transactions generated and saved to 'sales_transactions.csv'.")
-
-# Collect payments data in a list
-payments_data = []
-
-# Split the process into smaller chunks
-chunk_size = 100000  # This could be smaller to improve speed
-output_file = "payments.csv"
-header = ["payment_id", "order_id", "user_id", "payment_date", "payment_method", "total_paid", "transaction_fee", "payment_status"]
-
-# Initialize file once with header
-if not os.path.exists(output_file):
-    with open(output_file, "w") as f:
-        f.write(",".join(header) + "\n")
-
-# 4 Generate payments in chunks and accumulate them in a list
-for chunk in range(0, num_payments, chunk_size):
-    payments_chunk = []
-    start_index = chunk + 1
-    end_index = min(chunk + chunk_size, num_payments)
-
-    for i in range(start_index, end_index + 1):
-        payment_id = f"PY{i:06d}"  # e.g., PY000001
-        order_id = maybe_missing(random.choice(df_sales["order_id"].tolist()))
-        # Convert a customer_id into a user_id by replacing 'C' with 'U'
-        cust_id = random.choice(df_customers["customer_id"].tolist())
-        user_id = f"U{cust_id[1:]}"
-        payment_date = maybe_missing(random_date(order_date_start, order_date_end))
-        pay_method = maybe_missing(random.choice(["Credit Card", "PayPal", "Bank Transfer", "Cash on Delivery"]))
-        total_paid = maybe_missing(round(random.uniform(10, 2000), 2))
-        transaction_fee = maybe_missing(round(random.uniform(0.5, 10), 2))
-        pay_status = maybe_missing(random.choice(["Completed", "Pending", "Failed", "Refunded"]))
-
-        # Skip record if critical fields are missing
-        if order_id is None or payment_date is None or total_paid is None:
-            continue
-
-        payments_chunk.append([
-            payment_id,
-            order_id,
-            user_id,
-            payment_date,
-            pay_method if pay_method is not None else "Unknown",
-            total_paid,
-            transaction_fee if transaction_fee is not None else 0,
-            pay_status if pay_status is not None else "Pending"
-        ])
-
-    # Accumulate the current chunk of payments data
-    payments_data.extend(payments_chunk)
-    
-    print(f"Chunk {(chunk // chunk_size) + 1} processed: records {start_index} to {end_index}")
-
-# Convert the entire data to DataFrame once after all chunks
-df_payments = pd.DataFrame(payments_data, columns=header)
-
-# Write the full DataFrame to the CSV file in one go
-df_payments.to_csv(output_file, mode='a', header=False, index=False)
-
-print(f"Payments Data generation complete and saved to '{output_file}'.")
-
-
-# 5. Generate Marketing & Ads Data
-print("Generating Marketing & Ads Data...")
-ads_list = []
 ad_sources = ["Facebook", "Google Ads", "Instagram", "TikTok"]
+payment_methods = ["Credit Card", "PayPal", "Bank Transfer", "Cash on Delivery"]
+payment_statuses = ["Completed", "Pending", "Failed", "Refunded"]
+issue_types = ["Refund Request", "Order Delay", "Product Inquiry", "Account Issue"]
+resolution_statuses = ["Resolved", "Pending", "Escalated"]
+
+# --- Vectorized Helper Functions ---
+def make_ids(prefix, numbers, width):
+    """Format integer ids as e.g. 'C00001' for a whole array at once."""
+    digits = np.strings.zfill(np.asarray(numbers).astype(np.str_), width)
+    return pd.Series(np.strings.add(prefix, digits), dtype=object)
+
+def maybe_missing(rng, values, prob=missing_prob):
+    """Return `values` as a Series with each entry set to missing with probability `prob`."""
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < prob)
+
+def add_duplicates(df, duplicate_frac, seed=42):
+    """Append duplicates of a random fraction of rows to the dataframe."""
+    n_dup = int(len(df) * duplicate_frac)
+    if n_dup > 0:
+        dup_rows = df.sample(n=n_dup, random_state=seed)
+        df = pd.concat([df, dup_rows], ignore_index=True)
+    return df
 
-for i in range(1, num_ads + 1):
-    ad_source = maybe_missing(random.choice(ad_sources))
-    campaign_name = maybe_missing(fake.catch_phrase())
-    clicks = maybe_missing(random.randint(100, 10000))
-    conversions = maybe_missing(random.randint(10, 5000))
-    cost_per_click = maybe_missing(round(random.uniform(0.1, 5.0), 2))
-    roas = maybe_missing(round(random.uniform(1.0, 5.0), 2))
-    
-    ads_list.append([ad_source, campaign_name, clicks, conversions, cost_per_click, roas])
-
-df_ads = pd.DataFrame(ads_list, 
-    columns=["ad_source", "campaign_name", "clicks", "conversions", "cost_per_click", "return_on_ad_spend"])
-df_ads = add_duplicates(df_ads, duplicate_prob)
-df_ads.to_csv("marketing_ads.csv", index=False)
-print("Marketing & Ads Data generated and saved to 'marketing_ads.csv'.")
-
-# 6. Generate Customer Support Data
-print("Generating Customer Support Data...")
-tickets_list = []
-
-for i in range(1, num_tickets + 1):
-    ticket_id = f"T{i:04d}"  # e.g., T0001
-    customer_id = maybe_missing(random.choice(df_customers["customer_id"].tolist()))
-    issue_type = maybe_missing(random.choice(["Refund Request", "Order Delay", "Product Inquiry", "Account Issue"]))
-    response_time = maybe_missing(f"{random.randint(1,48)} hours")
-    resolution_status = maybe_missing(random.choice(["Resolved", "Pending", "Escalated"]))
-    feedback_rating = maybe_missing(round(random.uniform(1, 5), 1))
-    
-    tickets_list.append([ticket_id, customer_id, issue_type, response_time, resolution_status, feedback_rating])
-
-df_tickets = pd.DataFrame(tickets_list, 
-    columns=["ticket_id", "customer_id", "issue_type", "response_time", "resolution_status", "feedback_rating"])
-df_tickets = add_duplicates(df_tickets, duplicate_prob)
-df_tickets.to_csv("customer_support.csv", index=False)
-print("Customer Support Data generated and saved to 'customer_support.csv'.")
-
-print("Data generation complete. All CSV files have been saved.")
\ No newline at end of file
+def random_dates(rng, start, end, n):
+    """n random calendar dates between start and end (inclusive)."""
+    days = rng.integers(0, (end - start).days + 1, n)
+    return pd.Timestamp(start).normalize() + pd.to_timedelta(days, unit="D")
+
+def generate_phones(rng, n):
+    """Phone numbers starting with 0 following the pattern '0XXX XXX XX'."""
+    parts = [np.strings.zfill(rng.integers(0, 10**k, n).astype(np.str_), k) for k in (3, 3, 2)]
+    phones = np.strings.add(np.strings.add("0", parts[0]), np.strings.add(" ", parts[1]))
+    return pd.Series(np.strings.add(phones, np.strings.add(" ", parts[2])), dtype=object)
+
+def write_csv_chunk(df, f, include_header):
+    """Append `df` to the open binary file `f` using pyarrow's CSV writer.
+
+    Dates are written as YYYY-MM-DD. Values are only quoted when the chunk contains
+    one that needs it (a comma, quote or newline).
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+    buffer = io.BytesIO()
+    try:
+        pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(include_header=False, quoting_style="none"))
+    except pa.ArrowInvalid:
+        buffer = io.BytesIO()
+        pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(include_header=False))
+    if include_header:
+        f.write((",".join(df.columns) + "\n").encode())
+    f.write(buffer.getvalue())
+
+def emails_from_names(names):
+    """Email from the customer name: non-alphanumerics removed, lower case, '@gmail.com'."""
+    return names.str.replace(r"\W+", "", regex=True).str.lower() + "@gmail.com"
+
+class DataGenerator:
+    """Vectorized, seedable generator for the retail CSV files.
+
+    Every table is built and written in chunks of `chunk_size` rows, so output size is
+    bounded only by disk. Duplicates are sampled and appended per chunk.
+    """
+
+    def __init__(self, output_dir=".", seed=42, missing_prob=missing_prob, duplicate_prob=duplicate_prob,
+                 chunk_size=chunk_size):
+        self.output_dir = output_dir
+        self.seed = seed
+        self.missing_prob = missing_prob
+        self.duplicate_prob = duplicate_prob
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+
+        Faker.seed(seed)
+        fake = Faker()
+        self.name_pool = np.array([fake.name() for _ in range(faker_pool_size)], dtype=object)
+        self.catch_phrase_pool = np.array([fake.catch_phrase() for _ in range(faker_pool_size)], dtype=object)
+
+        today = datetime.today()
+        self.today = today
+        self.signup_start = today - timedelta(days=730)       # 2 years ago
+        self.last_active_start = today - timedelta(days=180)  # 6 months ago
+        self.order_date_start = today - timedelta(days=365)   # 1 year ago
+        self.churn_threshold = pd.Timestamp(today - timedelta(days=90))
+
+    def _missing(self, values):
+        return maybe_missing(self.rng, values, self.missing_prob)
+
+    def _write(self, file_name, num_rows, build_chunk, duplicates=True):
+        path = os.path.join(self.output_dir, file_name)
+        written = 0
+        with open(path, "wb") as f:
+            for chunk_number, start in enumerate(range(0, num_rows, self.chunk_size)):
+                stop = min(start + self.chunk_size, num_rows)
+                df = build_chunk(np.arange(start + 1, stop + 1))
+                if duplicates:
+                    df = add_duplicates(df, self.duplicate_prob, seed=self.seed + chunk_number)
+                write_csv_chunk(df, f, include_header=start == 0)
+                written += len(df)
+        print(f"{file_name}: {written} rows saved to '{path}'.")
+
+    # 1. Customers
+    def customers_chunk(self, ids):
+        n = len(ids)
+        rng = self.rng
+        names = self._missing(rng.choice(self.name_pool, n))
+        emails = self._missing(emails_from_names(names.fillna(""))).where(names.notna())
+        last_active_date = self._missing(random_dates(rng, self.last_active_start, self.today, n))
+        churn_status = pd.Series(
+            np.where(last_active_date >= self.churn_threshold, "Active", "Churned"), dtype=object
+        ).where(last_active_date.notna())
+        return pd.DataFrame({
+            "customer_id": make_ids("C", ids, 5),
+            "name": names,
+            "gender": rng.choice(["Male", "Female", "Other"], n),
+            "email": emails,
+            "phone_number": self._missing(generate_phones(rng, n)),
+            "signup_date": self._missing(random_dates(rng, self.signup_start, self.today, n)),
+            "last_active_date": last_active_date,
+            "location": self._missing(make_ids("City_", rng.integers(1, 101, n), 1)),
+            "churn_status": churn_status,
+        })
+
+    # 2. Products
+    def products_chunk(self, ids):
+        n = len(ids)
+        rng = self.rng
+        return pd.DataFrame({
+            "product_id": make_ids("P", ids, 4),
+            "name": self._missing(pd.Series(rng.choice(adjectives, n)) + " " + rng.choice(product_types, n)),
+            "category": self._missing(rng.choice(product_types, n)),
+            "price": self._missing(rng.uniform(5, 1000, n).round(2)),
+            "stock_quantity": self._missing(rng.integers(10, 501, n)),
+            "supplier": self._missing(make_ids("Supplier_", rng.integers(1, 51, n), 1)),
+            "rating": self._missing(rng.uniform(3.0, 5.0, n).round(1)),
+            "reviews_count": self._missing(rng.integers(5, 501, n)),
+        })
+
+    # 3. Sales Transactions
+    def sales_chunk(self, ids, num_customers, num_products, num_sales):
+        n = len(ids)
+        rng = self.rng
+        return pd.DataFrame({
+            "order_id": make_ids("R", ids, 7),
+            "customer_id": self._missing(make_ids("C", rng.integers(1, num_customers + 1, n), 5)),
+            "product_id": self._missing(make_ids("P", rng.integers(1, num_products + 1, n), 4)),
+            "order_date": self._missing(random_dates(rng, self.order_date_start, self.today, n)),
+            "total_amount": self._missing(rng.uniform(10, 2000, n).round(2)),
+            "payment_id": self._missing(make_ids("PY", rng.integers(1, num_sales + 1, n), 6)),
+        })
+
+    # 4. Payments (1:1 with sales, no duplicates injected)
+    def payments_chunk(self, ids, num_customers, num_sales):
+        n = len(ids)
+        rng = self.rng
+        return pd.DataFrame({
+            "payment_id": make_ids("PY", ids, 6),
+            "order_id": self._missing(make_ids("R", rng.integers(1, num_sales + 1, n), 7)),
+            # A customer_id turned into a user_id by replacing 'C' with 'U'
+            "user_id": make_ids("U", rng.integers(1, num_customers + 1, n), 5),
+            "payment_date": self._missing(random_dates(rng, self.order_date_start, self.today, n)),
+            "payment_method": self._missing(rng.choice(payment_methods, n)),
+            "total_paid": self._missing(rng.uniform(10, 2000, n).round(2)),
+            "transaction_fee": self._missing(rng.uniform(0.5, 10, n).round(2)),
+            "payment_status": self._missing(rng.choice(payment_statuses, n)),
+        })
+
+    # 5. Marketing & Ads
+    def ads_chunk(self, ids):
+        n = len(ids)
+        rng = self.rng
+        return pd.DataFrame({
+            "ad_source": self._missing(rng.choice(ad_sources, n)),
+            "campaign_name": self._missing(rng.choice(self.catch_phrase_pool, n)),
+            "clicks": self._missing(rng.integers(100, 10001, n)),
+            "conversions": self._missing(rng.integers(10, 5001, n)),
+            "cost_per_click": self._missing(rng.uniform(0.1, 5.0, n).round(2)),
+            "return_on_ad_spend": self._missing(rng.uniform(1.0, 5.0, n).round(2)),
+        })
+
+    # 6. Customer Support
+    def tickets_chunk(self, ids, num_customers):
+        n = len(ids)
+        rng = self.rng
+        return pd.DataFrame({
+            "ticket_id": make_ids("T", ids, 4),
+            "customer_id": self._missing(make_ids("C", rng.integers(1, num_customers + 1, n), 5)),
+            "issue_type": self._missing(rng.choice(issue_types, n)),
+            "response_time": self._missing(pd.Series(rng.integers(1, 49, n)).astype(str) + " hours"),
+            "resolution_status": self._missing(rng.choice(resolution_statuses, n)),
+            "feedback_rating": self._missing(rng.uniform(1, 5, n).round(1)),
+        })
+
+    def generate_all(self, num_customers=num_customers, num_products=num_products, num_sales=num_sales,
+                     num_payments=None, num_ads=num_ads, num_tickets=num_tickets):
+        num_payments = num_sales if num_payments is None else num_payments
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self._write("customers.csv", num_customers, self.customers_chunk)
+        self._write("products.csv", num_products, self.products_chunk)
+        self._write(
+            "sales_transactions.csv", num_sales,
+            lambda ids: self.sales_chunk(ids, num_customers, num_products, num_sales),
+        )
+        self._write(
+            "payments.csv", num_payments,
+            lambda ids: self.payments_chunk(ids, num_customers, num_sales),
+            duplicates=False,
+        )
+        self._write("marketing_ads.csv", num_ads, self.ads_chunk)
+        self._write("customer_support.csv", num_tickets, lambda ids: self.tickets_chunk(ids, num_customers))
+        print("Data generation complete. All CSV files have been saved.")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic retail CSV files.")
+    parser.add_argument("--output-dir", default=".", help="Where to write the CSV files.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the NumPy and Faker RNGs.")
+    parser.add_argument("--customers", type=int, default=num_customers)
+    parser.add_argument("--products", type=int, default=num_products)
+    parser.add_argument("--sales", type=int, default=num_sales)
+    parser.add_argument("--payments", type=int, default=None, help="Defaults to the number of sales.")
+    parser.add_argument("--ads", type=int, default=num_ads)
+    parser.add_argument("--tickets", type=int, default=num_tickets)
+    parser.add_argument("--missing-prob", type=float, default=missing_prob)
+    parser.add_argument("--duplicate-prob", type=float, default=duplicate_prob)
+    parser.add_argument("--chunk-size", type=int, default=chunk_size, help="Rows generated and written at a time.")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    generator = DataGenerator(
+        output_dir=args.output_dir,
+        seed=args.seed,
+        missing_prob=args.missing_prob,
+        duplicate_prob=args.duplicate_prob,
+        chunk_size=args.chunk_size,
+    )
+    generator.generate_all(
+        num_customers=args.customers,
+        num_products=args.products,
+        num_sales=args.sales,
+        num_payments=args.payments,
+        num_ads=args.ads,
+        num_tickets=args.tickets,
+    )
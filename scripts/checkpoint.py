@@ -0,0 +1,164 @@
+# scripts/checkpoint.py
+#
+# Checkpoints that let a failed run be resumed under the same run ID. Each run keeps
+# one directory holding
+#
+#   run_state.json            the stages that finished and the load batches committed
+#   <stage>/<frame>.parquet   the frames each finished stage produced
+#
+# A rerun reads a finished stage's frames back instead of recomputing them, and the
+# loader skips every batch (a whole table or a streamed chunk) that already
+# committed. State only ever grows, so concurrent writers (Airflow tasks of one DAG run)
+# merge their updates under a file lock instead of overwriting each other.
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from scripts.load_to_postgres import is_arrow_table
+from scripts.pipeline_layout import PROJECT_DIR
+from scripts.schemas import arrow_to_pandas
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(PROJECT_DIR, ".checkpoints")
+
+# Load batch name of a table loaded in one transaction
+TABLE_BATCH = "table"
+
+def run_directory(root, run_id):
+    """Directory under `root` holding one run's files (Airflow run IDs contain ':' and '+')."""
+    return os.path.join(root, re.sub(r"[^\w.-]", "_", run_id))
+
+def input_run_id(mode, sources, **options):
+    """A run ID that stays the same while the source files and `options` do.
+
+    `sources` maps table names to file paths (see source_manifest.resolve_sources);
+    each file counts with its size and modification time. Rerunning a failed run
+    unchanged therefore resumes it, while new inputs or options start a fresh run.
+    """
+    files = {
+        table_name: [(path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths]
+        for table_name, paths in sources.items()
+    }
+    payload = json.dumps({"mode": mode, "files": files, "options": options}, sort_keys=True, default=str)
+    return f"{mode}-{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+def write_frame(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if is_arrow_table(df):
+        pq.write_table(df, tmp_path)
+    else:
+        df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def read_frame(path):
+    return arrow_to_pandas(pq.read_table(path, memory_map=True))
+
+class RunCheckpoint:
+    """The run-state file and stage frames of one run, kept in `run_dir`."""
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, "run_state.json")
+        self._lock = threading.Lock()
+        os.makedirs(run_dir, exist_ok=True)
+        self.state = self._read()
+
+    @classmethod
+    def for_run(cls, run_id, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+        return cls(run_directory(checkpoint_dir, run_id))
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {"stages": {}, "loads": {}}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def _update(self, change):
+        # Re-read under the lock so updates of other processes are kept, then apply ours
+        with self._lock, open(os.path.join(self.run_dir, "run_state.lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._read()
+            change(state)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self.state = state
+
+    # ---------------------
+    # Stages
+    # ---------------------
+
+    def stage_done(self, stage):
+        return stage in self.state["stages"]
+
+    def stage_info(self, stage):
+        return self.state["stages"][stage]
+
+    def finish_stage(self, stage, **info):
+        """Record `stage` as finished, with `info` (e.g. its row count) for a rerun to report."""
+        info["finished_at"] = datetime.now(timezone.utc).isoformat()
+        self._update(lambda state: state["stages"].__setitem__(stage, info))
+
+    def frame_path(self, stage, name):
+        return os.path.join(self.run_dir, stage, f"{name}.parquet")
+
+    def run_stage(self, stage, build):
+        """The frames of `stage` by name: read back if it finished earlier, else built by
+        `build()` and saved. Every frame is written before the stage counts as finished."""
+        if self.stage_done(stage):
+            names = self.stage_info(stage)["frames"]
+            print(f"[Checkpoint] Reusing stage '{stage}' from {self.run_dir}")
+            return {name: read_frame(self.frame_path(stage, name)) for name in names}
+
+        frames = build()
+        for name, df in frames.items():
+            write_frame(df, self.frame_path(stage, name))
+        self.finish_stage(stage, frames={name: len(df) for name, df in frames.items()})
+        return frames
+
+    # ---------------------
+    # Load batches
+    # ---------------------
+
+    def loaded_batches(self, table_name):
+        return set(self.state["loads"].get(table_name, []))
+
+    def batch_loaded(self, table_name, batch=None):
+        return (batch or TABLE_BATCH) in self.loaded_batches(table_name)
+
+    def mark_loaded(self, table_name, batch=None):
+        """Record that `batch` of `table_name` (default: the whole table) has committed.
+
+        Call only once the batch's transaction has committed.
+        """
+        batch = batch or TABLE_BATCH
+
+        def change(state):
+            batches = state["loads"].setdefault(table_name, [])
+            if batch not in batches:
+                batches.append(batch)
+        self._update(change)
+
+    def discard(self):
+        """Remove the run's checkpoints once it has finished."""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+def checkpointed(checkpoint, stage, build):
+    """`checkpoint.run_stage(stage, build)`, or just `build()` when not checkpointing."""
+    if checkpoint is None:
+        return build()
+    return checkpoint.run_stage(stage, build)
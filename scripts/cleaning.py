@@ -0,0 +1,133 @@
+# scripts/cleaning.py
+
+import pandas as pd
+
+# ---------------------
+# Cleaning Specs
+# ---------------------
+# Per source table:
+#   required   - rows missing any of these columns are dropped
+#   fill       - constant fill value per column
+#   fill_stats - column filled with its own "median" or "mean" (taken after the drop)
+#   fill_from  - column filled from another column of the same row
+#   dates      - columns coerced to datetime (unparseable values become NaT)
+
+CLEANING_SPECS = {
+    "customers": {
+        "required": ["signup_date"],
+        "fill": {
+            "name": "Unknown",
+            "email": "Unknown",
+            "phone_number": "000-000000",
+            "location": "Unknown",
+            "churn_status": "Active",
+        },
+        "fill_stats": {},
+        "fill_from": {"last_active_date": "signup_date"},
+        "dates": ["signup_date", "last_active_date"],
+    },
+    "sales_transactions": {
+        "required": ["customer_id", "product_id", "order_date", "total_amount"],
+        "fill": {"payment_id": "Unknown"},
+        "fill_stats": {},
+        "fill_from": {},
+        "dates": ["order_date"],
+    },
+    "products": {
+        "required": [],
+        "fill": {
+            "name": "Unknown Product",
+            "category": "Other",
+            "stock_quantity": 0,
+            "supplier": "Unknown Supplier",
+            "reviews_count": 0,
+        },
+        "fill_stats": {"price": "median", "rating": "mean"},
+        "fill_from": {},
+        "dates": [],
+    },
+    "payments": {
+        "required": ["order_id", "payment_date", "total_paid"],
+        "fill": {"payment_method": "Unknown", "payment_status": "Pending"},
+        "fill_stats": {"transaction_fee": "median"},
+        "fill_from": {},
+        "dates": ["payment_date"],
+    },
+    "marketing_ads": {
+        "required": [],
+        "fill": {
+            "ad_source": "Unknown",
+            "campaign_name": "Unnamed Campaign",
+            "clicks": 0,
+            "conversions": 0,
+        },
+        "fill_stats": {"cost_per_click": "mean", "return_on_ad_spend": "median"},
+        "fill_from": {},
+        "dates": [],
+    },
+    "customer_support": {
+        "required": ["ticket_id", "customer_id"],
+        "fill": {
+            "issue_type": "Unknown",
+            "response_time": "Unknown",
+            "resolution_status": "Pending",
+        },
+        "fill_stats": {"feedback_rating": "median"},
+        "fill_from": {},
+        "dates": [],
+    },
+}
+
+# ---------------------
+# Cleaning Engine
+# ---------------------
+
+def drop_incomplete(df, spec):
+    """Rows of `df` that have every required column, via one combined null mask."""
+    if not spec["required"]:
+        return df
+    keep = df[spec["required"]].notna().all(axis=1)
+    return df if keep.all() else df[keep]
+
+def column_stats(df, spec):
+    """The median/mean fill values of `spec` computed over `df` (already drop_incomplete'd).
+
+    Computed separately so a caller cleaning a table piece by piece can pass the
+    statistics of the whole table to apply_cleaning_spec instead.
+    """
+    return {col: getattr(df[col], how)() for col, how in spec["fill_stats"].items()}
+
+def _with_fill_categories(series, value):
+    # fillna on a categorical only accepts values that are already categories
+    if isinstance(series.dtype, pd.CategoricalDtype) and not isinstance(value, pd.Series):
+        if not pd.isna(value) and value not in series.cat.categories:
+            return series.cat.add_categories([value])
+    return series
+
+def apply_cleaning_spec(df, spec, stats=None):
+    """Clean `df` according to `spec` and return the cleaned frame.
+
+    One null-mask pass drops incomplete rows, then every fill (constants, statistics
+    and other columns) is applied in a single dict `fillna` over just the columns that
+    have gaps. Columns that need no work are shared with the input, not copied.
+    """
+    df = drop_incomplete(df, spec)
+    if stats is None:
+        stats = column_stats(df, spec)
+
+    fills = {**spec["fill"], **stats}
+    fills.update({col: df[source] for col, source in spec["fill_from"].items()})
+    fills = {col: value for col, value in fills.items() if df[col].hasnans}
+
+    # A shallow copy: replacing columns below never writes into the caller's frame
+    df = df.copy(deep=False)
+    if fills:
+        for col, value in fills.items():
+            df[col] = _with_fill_categories(df[col], value)
+        filled = df[list(fills)].fillna(fills)
+        for col in fills:
+            df[col] = filled[col]
+    for col in spec["dates"]:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
@@ -0,0 +1,104 @@
+# scripts/customer_activity.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.incremental import DEFAULT_STATE_DIR
+
+# Churn windows reported for every customer; sales_mart.churned uses one of them
+CHURN_WINDOWS = (30, 60, 90)
+
+def last_order_dates(sales, previous=None):
+    """Latest order_date per customer in cleaned `sales`, combined with `previous` if given."""
+    order_dates = sales["order_date"]
+    if not pd.api.types.is_datetime64_any_dtype(order_dates):
+        order_dates = pd.to_datetime(order_dates, errors="coerce")
+    latest = order_dates.groupby(sales["customer_id"], observed=True).max()
+    if previous is not None:
+        latest = pd.concat([previous, latest]).groupby(level=0).max()
+    return latest
+
+def churned_customers(customer_last_order, window_days):
+    """Per customer: True if their last order is more than `window_days` before the latest order."""
+    cutoff = customer_last_order.max() - pd.Timedelta(days=window_days)
+    return customer_last_order < cutoff
+
+def lookup_flags(customer_ids, flags):
+    """`flags` (a boolean Series by customer_id) looked up for each of `customer_ids`; unknown IDs are False."""
+    positions = flags.index.get_indexer(customer_ids)
+    return np.where(positions >= 0, flags.to_numpy(dtype=bool)[positions], False)
+
+class CustomerActivityStore:
+    """Last order date and source churn_status per customer, kept between runs.
+
+    The state is a Parquet file next to the incremental watermarks. Each run folds in
+    only its new sales, so the churn flags become a lookup against this table instead
+    of a group-by over the whole sales history.
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR):
+        self.path = os.path.join(state_dir, "customer_activity.parquet")
+        os.makedirs(state_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            self.activity = pd.read_parquet(self.path)
+        else:
+            self.activity = pd.DataFrame(
+                {
+                    "last_order_date": pd.Series(dtype="datetime64[ns]"),
+                    "churn_status": pd.Series(dtype="object"),
+                },
+                index=pd.Index([], name="customer_id"),
+            )
+
+    def __len__(self):
+        return len(self.activity)
+
+    @property
+    def last_order(self):
+        return self.activity["last_order_date"]
+
+    def update(self, sales, customers=None):
+        """Fold cleaned `sales` rows into the last order dates (they never move backwards).
+
+        With `customers`, their current churn_status replaces the stored one.
+        """
+        latest = last_order_dates(sales, previous=self.last_order)
+        activity = self.activity.reindex(latest.index)
+        activity["last_order_date"] = latest
+        if customers is not None:
+            status = customers.drop_duplicates("customer_id", keep="last").set_index("customer_id")["churn_status"]
+            status = status.astype(object).reindex(latest.index)
+            activity["churn_status"] = status.fillna(activity["churn_status"])
+        self.activity = activity.rename_axis("customer_id")
+
+    def changed_flags(self, previous_last_order, window_days):
+        """Customers whose churn flag for `window_days` differs from the one implied by
+        `previous_last_order`, as a frame of customer_id and their new `churned` flag.
+
+        A new latest order moves the reference date for everyone, so this is how rows
+        loaded by earlier runs are kept in step.
+        """
+        before = churned_customers(previous_last_order, window_days).reindex(self.activity.index, fill_value=False)
+        after = churned_customers(self.last_order, window_days)
+        changed = after[after != before.astype(bool)]
+        return pd.DataFrame({"customer_id": changed.index, "churned": changed.to_numpy(dtype=bool)})
+
+    def churn_flags(self, windows=CHURN_WINDOWS):
+        """One boolean column `churned_<n>d` per window, by customer_id."""
+        return pd.DataFrame(
+            {f"churned_{days}d": churned_customers(self.last_order, days) for days in windows},
+            index=self.activity.index,
+        )
+
+    def status_mismatches(self, window_days):
+        """Customers whose order-based churn flag disagrees with their source churn_status."""
+        known = self.activity["churn_status"].notna()
+        flagged = churned_customers(self.last_order, window_days)
+        return int((known & (flagged != (self.activity["churn_status"] == "Churned"))).sum())
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self.activity.to_parquet(tmp_path)
+        os.replace(tmp_path, self.path)
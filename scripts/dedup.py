@@ -0,0 +1,150 @@
+# scripts/dedup.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.metrics import track
+
+# Natural key of each source table; None means whole-row duplicates (marketing_ads has
+# no ID column). Rows with a missing key are never treated as duplicates of each other.
+DEDUP_KEYS = {
+    "customers": ["customer_id"],
+    "sales_transactions": ["order_id"],
+    "products": ["product_id"],
+    "payments": ["payment_id"],
+    "marketing_ads": None,
+    "customer_support": ["ticket_id"],
+}
+
+def row_hashes(df, columns=None):
+    """64-bit hash per row of `df[columns]` (all columns if None), as a uint64 array.
+
+    With 64-bit hashes the chance of any collision among 10 million distinct rows is
+    about 3 in a million, which is accepted here in exchange for not comparing values.
+    """
+    subset = df if columns is None else df[columns]
+    return pd.util.hash_pandas_object(subset, index=False).to_numpy()
+
+def _keyed(df, keys):
+    # Rows whose key is complete; only those take part in key-based dedup
+    if keys is None:
+        return np.ones(len(df), dtype=bool)
+    return df[keys].notna().all(axis=1).to_numpy()
+
+def deduplicate(df, table_name, keys="default"):
+    """Drop repeated rows of `df`, keeping the first occurrence of each key.
+
+    `keys` defaults to the table's DEDUP_KEYS entry; pass a column list, or None to
+    compare whole rows. Returns the deduplicated frame and prints how many rows went.
+    """
+    if df is None:
+        return None
+    if keys == "default":
+        keys = DEDUP_KEYS[table_name]
+
+    with track(f"dedup_{table_name}", rows_in=len(df), keys=keys) as record:
+        duplicated = pd.Series(row_hashes(df, keys)).duplicated().to_numpy() & _keyed(df, keys)
+        if duplicated.any():
+            df = df[~duplicated]
+        record["rows_out"] = len(df)
+    print(f"[Dedup] {table_name}: {int(duplicated.sum())} duplicate rows removed")
+    return df
+
+# ChunkDeduplicator splits its seen set into this many ranges of the hash space, and
+# keeps at most this many new hashes in memory before merging them into spilled ones
+DEDUP_PARTITIONS = 16
+DEDUP_BUFFER_ROWS = 1_000_000
+
+_NO_HASHES = np.empty(0, dtype=np.uint64)
+
+def _contains(sorted_hashes, hashes):
+    # Membership of each of `hashes` in the sorted array `sorted_hashes`
+    if not len(sorted_hashes):
+        return np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+    return sorted_hashes[positions] == hashes
+
+def merge_sorted(a, b):
+    """The sorted union of the sorted arrays `a` and `b`, in one linear merge."""
+    merged = np.concatenate([a, b])
+    # Two presorted runs: the stable sort (timsort) just merges them
+    merged.sort(kind="stable")
+    return merged
+
+class ChunkDeduplicator:
+    """Drops rows already seen in earlier chunks of a table streamed in pieces.
+
+    Only 8-byte row hashes are kept, not the rows, split into `partitions` ranges of the
+    hash space that are each a sorted array. A chunk's hashes are sorted once and merged
+    into the ranges they fall in. With `directory` the ranges are spilled there as .npy
+    files, so memory holds at most `buffer_rows` recent hashes plus one range while it is
+    merged, and a seen set saved by an earlier run is picked up again.
+    """
+
+    def __init__(
+        self, table_name, keys="default", directory=None, partitions=DEDUP_PARTITIONS, buffer_rows=DEDUP_BUFFER_ROWS
+    ):
+        self.table_name = table_name
+        self.keys = DEDUP_KEYS[table_name] if keys == "default" else keys
+        self.directory = directory
+        self.partitions = partitions
+        self.buffer_rows = buffer_rows
+        self._bounds = np.arange(1, partitions, dtype=np.uint64) * np.uint64(2**64 // partitions)
+        self._buffer = [_NO_HASHES] * partitions
+        self._buffered = 0
+        self.duplicates = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _partition_path(self, partition):
+        return os.path.join(self.directory, f"part-{partition:05d}.npy")
+
+    def _spilled(self, partition):
+        # Memory-mapped, so a lookup only reads the pages it searches
+        if self.directory is None or not os.path.exists(self._partition_path(partition)):
+            return _NO_HASHES
+        return np.load(self._partition_path(partition), mmap_mode="r")
+
+    def _record_new(self, hashes):
+        # `hashes`: sorted and unique. Returns the ones seen before and buffers the rest
+        seen = []
+        ranges = np.split(hashes, np.searchsorted(hashes, self._bounds))
+        for partition, part in enumerate(ranges):
+            if not len(part):
+                continue
+            is_seen = _contains(self._buffer[partition], part) | _contains(self._spilled(partition), part)
+            seen.append(part[is_seen])
+            self._buffer[partition] = merge_sorted(self._buffer[partition], part[~is_seen])
+            self._buffered += int((~is_seen).sum())
+        return np.concatenate(seen) if seen else _NO_HASHES
+
+    def drop_seen(self, chunk):
+        """`chunk` without rows repeated within it or seen in any earlier chunk."""
+        with track(f"dedup_{self.table_name}", rows_in=len(chunk), keys=self.keys) as record:
+            hashes = row_hashes(chunk, self.keys)
+            keyed = _keyed(chunk, self.keys)
+            seen_before = self._record_new(np.unique(hashes[keyed]))
+            duplicated = (pd.Series(hashes).duplicated().to_numpy() | _contains(seen_before, hashes)) & keyed
+            if duplicated.any():
+                chunk = chunk[~duplicated]
+            self.duplicates += int(duplicated.sum())
+            record["rows_out"] = len(chunk)
+        if self.directory is not None and self._buffered > self.buffer_rows:
+            self.save()
+        return chunk
+
+    def save(self):
+        """Merge the buffered hashes into the spilled ranges (no-op without `directory`)."""
+        if self.directory is None:
+            return
+        for partition, buffered in enumerate(self._buffer):
+            if not len(buffered):
+                continue
+            merged = merge_sorted(self._spilled(partition), buffered)
+            tmp_path = f"{self._partition_path(partition)}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, merged)
+            os.replace(tmp_path, self._partition_path(partition))
+            self._buffer[partition] = _NO_HASHES
+        self._buffered = 0
@@ -0,0 +1,55 @@
+# scripts/elt.py
+
+from scripts.customer_activity import CHURN_WINDOWS
+from scripts.load_to_postgres import quote_ident
+from scripts.metrics import track
+from scripts.sql_schema import CREATE_MARTS_SQL, materialized_view_names, split_statements, table_key
+from scripts.transform_data import CHURN_WINDOW_DAYS
+
+def with_table_key(df, table_name):
+    """Drop rows missing any primary key column of the raw table (those cannot be loaded)."""
+    key = [col for col in table_key(table_name) if col in df.columns]
+    if not key:
+        return df
+    complete = df[key].notna().all(axis=1)
+    if not complete.all():
+        print(f"[ELT] {table_name}: skipping {int((~complete).sum())} rows without {', '.join(key)}")
+        df = df[complete]
+    return df
+
+def existing_materialized_views(conn):
+    result = conn.exec_driver_sql(
+        "SELECT matviewname FROM pg_matviews WHERE schemaname = current_schema()"
+    )
+    return {row[0] for row in result}
+
+def marts_sql(path=CREATE_MARTS_SQL, churn_window_days=CHURN_WINDOW_DAYS, churn_windows=CHURN_WINDOWS):
+    """The mart script at `path` with its churn windows filled in."""
+    with open(path) as f:
+        sql = f.read()
+    columns = ",\n    ".join(
+        f"i.idle_time > INTERVAL '{int(days)} days' AS churned_{int(days)}d" for days in churn_windows
+    )
+    return sql.format(churn_window_days=int(churn_window_days), churn_window_columns=columns)
+
+def build_marts_in_database(engine, path=CREATE_MARTS_SQL):
+    """Create the join indexes and mart materialized views of `path`, then refresh them.
+
+    Views that did not exist yet are populated by their CREATE; existing ones are
+    refreshed CONCURRENTLY, each in its own transaction, so readers keep seeing the
+    previous contents until the refresh commits.
+    """
+    statements = split_statements(marts_sql(path))
+
+    with engine.begin() as conn:
+        existing = existing_materialized_views(conn)
+        for stmt in statements:
+            conn.exec_driver_sql(stmt)
+
+    for view in materialized_view_names(path):
+        if view not in existing:
+            print(f"[ELT] Created materialized view {view}")
+            continue
+        with track(f"refresh_{view}"), engine.begin() as conn:
+            conn.exec_driver_sql(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {quote_ident(view)}")
+        print(f"[ELT] Refreshed materialized view {view}")
@@ -1,19 +1,204 @@
 # scripts/extract_data.py
 
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
-def extract_all_data(data_path="../Data"):
+from scripts.metrics import track
+from scripts.pipeline_layout import SOURCE_TABLES
+from scripts.schemas import TABLE_SCHEMAS, concat_frames, open_source, read_options, read_table
+from scripts.source_manifest import DEFAULT_DATA_PATH, load_manifest, resolve_sources
+
+SALES_CHUNK_SIZE = 100_000
+
+def _table_reader(engine="c", staging_dir=None):
+    # With a staging dir, unchanged CSVs come from the typed Parquet cache instead
+    if staging_dir is None:
+        reader = lambda path, table_name, key: read_table(path, table_name, engine=engine)
+    else:
+        from scripts.staging_cache import StagingCache
+        cache = StagingCache(staging_dir)
+        reader = lambda path, table_name, key: cache.read(path, table_name, engine=engine, key=key)
+
+    def read(path, table_name, key=None):
+        with track(f"extract_{table_name}", engine=engine, staged=staging_dir is not None, source=path) as record:
+            df = reader(path, table_name, key)
+            record["rows_out"] = len(df)
+        return df
+    return read
+
+def _staging_key(table_name, path, paths):
+    # A table read from several files stages each file under its own key
+    return None if len(paths) == 1 else f"{table_name}.{os.path.basename(path)}"
+
+def _submit_reads(pool, read, sources):
+    # One future per source file
+    futures = {}
+    for table_name, paths in sources.items():
+        futures[table_name] = [pool.submit(read, path, table_name, _staging_key(table_name, path, paths)) for path in paths]
+    return futures
+
+def extract_tables(
+    table_names,
+    data_path=DEFAULT_DATA_PATH,
+    engine="c",
+    staging_dir=None,
+    manifest=None,
+    max_workers=None,
+):
+    """Read the source files of `table_names` concurrently; returns one DataFrame per table.
+
+    Each table's files are matched by the glob patterns of the source manifest at
+    `manifest` (see source_manifest.load_manifest; defaults without one) and read on
+    one thread pool of `max_workers` threads shared by all tables. A table spread over
+    several files is concatenated in file-name order.
+    """
+    sources = resolve_sources(data_path, load_manifest(manifest), table_names)
+    read = _table_reader(engine, staging_dir)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as pool:
+        futures = _submit_reads(pool, read, sources)
+        tables = {
+            table_name: concat_frames([future.result() for future in table_futures])
+            for table_name, table_futures in futures.items()
+        }
+    for table_name, paths in sources.items():
+        if len(paths) > 1:
+            print(f"[Extract] {table_name}: {len(tables[table_name])} rows from {len(paths)} files")
+    return tables
+
+def iter_table_files(
+    table_name,
+    data_path=DEFAULT_DATA_PATH,
+    engine="c",
+    staging_dir=None,
+    manifest=None,
+    max_workers=None,
+):
+    """Yield one DataFrame per source file of `table_name`, in file-name order.
+
+    Files are read ahead concurrently on a thread pool, so the caller can process one
+    file while the next ones are parsed.
+    """
+    sources = resolve_sources(data_path, load_manifest(manifest), [table_name])
+    read = _table_reader(engine, staging_dir)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as pool:
+        for future in _submit_reads(pool, read, sources)[table_name]:
+            yield future.result()
+
+def extract_all_data(data_path=DEFAULT_DATA_PATH, engine="c", staging_dir=None, manifest=None, max_workers=None):
     print("[Extract] Reading CSV files from", data_path)
-    
-    customers = pd.read_csv(f"{data_path}customers.csv")
-    sales = pd.read_csv(f"{data_path}sales_transactions.csv")
-    products = pd.read_csv(f"{data_path}products.csv")
-    payments = pd.read_csv(f"{data_path}payments.csv")
-    marketing_ads = pd.read_csv(f"{data_path}marketing_ads.csv")
-    customer_support = pd.read_csv(f"{data_path}customer_support.csv")
-    
+    tables = extract_tables(SOURCE_TABLES, data_path, engine, staging_dir, manifest, max_workers)
     print("[Extract] Done reading CSV files.")
-    return customers, sales, products, payments, marketing_ads, customer_support
+    return tuple(tables[table_name] for table_name in SOURCE_TABLES)
+
+# Tables streaming mode reads chunk by chunk instead of whole
+STREAMED_TABLES = ["sales_transactions", "payments"]
+
+def extract_dimensions(data_path=DEFAULT_DATA_PATH, engine="c", staging_dir=None, manifest=None, max_workers=None):
+    """Read every table except the STREAMED_TABLES, which are streamed separately."""
+    print("[Extract] Reading dimension CSV files from", data_path)
+    table_names = [table_name for table_name in SOURCE_TABLES if table_name not in STREAMED_TABLES]
+    tables = extract_tables(table_names, data_path, engine, staging_dir, manifest, max_workers)
+    print("[Extract] Done reading dimension CSV files.")
+    return tuple(tables[table_name] for table_name in table_names)
+
+def extract_table(table_name, data_path=DEFAULT_DATA_PATH, engine="c", staging_dir=None, manifest=None):
+    """Read a single source table, e.g. for one per-table task of the Airflow DAG."""
+    return extract_tables([table_name], data_path, engine, staging_dir, manifest)[table_name]
+
+def iter_file_chunks(path, table_name, chunksize=SALES_CHUNK_SIZE, usecols=None):
+    """Yield the source file at `path` of `table_name` as DataFrames of at most `chunksize` rows."""
+    print(f"[Extract] Streaming {path} in chunks of {chunksize} rows")
+    with open_source(path) as source, pd.read_csv(source, chunksize=chunksize, **read_options(table_name, usecols)) as reader:
+        for chunk in reader:
+            yield chunk
+
+def iter_table_chunks(table_name, data_path=DEFAULT_DATA_PATH, chunksize=SALES_CHUNK_SIZE, usecols=None, manifest=None):
+    """Yield every source file of `table_name` as DataFrames of at most `chunksize` rows."""
+    for path in resolve_sources(data_path, load_manifest(manifest), [table_name])[table_name]:
+        yield from iter_file_chunks(path, table_name, chunksize, usecols)
+
+def empty_table(table_name, path):
+    """`table_name` with the columns and dtypes of its source file at `path`, but no rows."""
+    with open_source(path) as source:
+        return pd.read_csv(source, nrows=0, **read_options(table_name))
+
+def extract_rows(table_name, paths, keep, engine="c", staging_dir=None, chunksize=SALES_CHUNK_SIZE):
+    """The rows of `table_name`'s source files `paths` selected by `keep(frame)`, a boolean mask.
+
+    With a staging dir each file is read whole through the Parquet cache (and staged
+    for later runs); without one the CSVs are scanned in chunks of `chunksize` rows.
+    Either way only the selected rows outlive the file or chunk they were read from.
+    """
+    if staging_dir is None:
+        frames = (chunk for path in paths for chunk in iter_file_chunks(path, table_name, chunksize))
+    else:
+        read = _table_reader(engine, staging_dir)
+        frames = (read(path, table_name, _staging_key(table_name, path, paths)) for path in paths)
+    kept = [frame[keep(frame)] for frame in frames]
+    return concat_frames(kept) if kept else empty_table(table_name, paths[0])
+
+def extract_matching_rows(table_name, paths, column, values, engine="c", staging_dir=None, chunksize=SALES_CHUNK_SIZE):
+    """The rows of `table_name`'s source files `paths` whose `column` is one of `values`.
+
+    Files the staging cache holds unchanged are read with the filter pushed into the
+    Parquet scan, so neither their CSVs are parsed nor their other rows materialized.
+    """
+    if staging_dir is None:
+        return extract_rows(table_name, paths, lambda df: df[column].isin(values), chunksize=chunksize)
+
+    from scripts.staging_cache import StagingCache
+    cache = StagingCache(staging_dir)
+    frames = [
+        cache.read_matching(path, table_name, column, values, engine=engine, key=_staging_key(table_name, path, paths))
+        for path in paths
+    ]
+    return concat_frames(frames)
+
+def iter_sales_chunks(data_path=DEFAULT_DATA_PATH, chunksize=SALES_CHUNK_SIZE, usecols=None, manifest=None):
+    """Yield every sales_transactions source file as DataFrames of at most `chunksize` rows."""
+    return iter_table_chunks("sales_transactions", data_path, chunksize, usecols, manifest)
+
+def memory_report(data_path=DEFAULT_DATA_PATH, engine="c"):
+    """Compare time and in-memory footprint of inferred vs schema-typed reads per table."""
+    rows = []
+    for table_name, schema in TABLE_SCHEMAS.items():
+        path = os.path.join(data_path, schema["file"])
+        started = time.perf_counter()
+        inferred = pd.read_csv(path)
+        inferred_secs = time.perf_counter() - started
+        started = time.perf_counter()
+        typed = read_table(path, table_name, engine=engine)
+        typed_secs = time.perf_counter() - started
+        inferred_mb = inferred.memory_usage(deep=True).sum() / 2**20
+        typed_mb = typed.memory_usage(deep=True).sum() / 2**20
+        rows.append({
+            "table": table_name,
+            "rows": len(typed),
+            "inferred_mb": round(inferred_mb, 2),
+            "typed_mb": round(typed_mb, 2),
+            "memory_ratio": round(typed_mb / inferred_mb, 3) if inferred_mb else None,
+            "inferred_read_s": round(inferred_secs, 3),
+            "typed_read_s": round(typed_secs, 3),
+        })
+    return pd.DataFrame(rows)
 
 if __name__ == "__main__":
-    extract_all_data()
+    parser = argparse.ArgumentParser(description="Extract the source CSV files.")
+    parser.add_argument("--data-path", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--source-manifest", default=None, help="JSON file of glob patterns per source table.")
+    parser.add_argument("--engine", choices=["c", "pyarrow"], default="c", help="pandas CSV parser engine.")
+    parser.add_argument("--staging-dir", default=None, help="Parquet cache for unchanged CSVs (off if omitted).")
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Print inferred vs typed memory footprint per table instead of just extracting.",
+    )
+    args = parser.parse_args()
+    if args.memory_report:
+        print(memory_report(args.data_path, args.engine).to_string(index=False))
+    else:
+        extract_all_data(args.data_path, args.engine, args.staging_dir, args.source_manifest)
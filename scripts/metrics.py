@@ -0,0 +1,147 @@
+# scripts/metrics.py
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from scripts.pipeline_layout import PROJECT_DIR
+
+logger = logging.getLogger("etl.metrics")
+
+DEFAULT_METRICS_DIR = os.path.join(PROJECT_DIR, "metrics")
+XCOM_KEY = "etl_metrics"
+
+_active_run = None
+_active_lock = threading.Lock()
+
+def current_rss_mb():
+    """Resident set size of this process, from /proc where available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS; only the peak is available here
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+class RunMetrics:
+    """Collects per-stage metrics for one pipeline run.
+
+    While active (`with RunMetrics(...)`), every `track()` block anywhere in the
+    pipeline, including load threads, records into it. Each stage is logged as one JSON
+    line on the "etl.metrics" logger, and all of them are written to
+    `<metrics_dir>/<run_id>.json` when the run ends.
+    """
+
+    def __init__(self, run_id=None, metrics_dir=DEFAULT_METRICS_DIR):
+        self.run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        self.metrics_dir = metrics_dir
+        self.started_at = None
+        self.finished_at = None
+        self.status = None
+        self.seconds = None
+        self.stages = []
+        self._started = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        global _active_run
+        with _active_lock:
+            _active_run = self
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active_run
+        with _active_lock:
+            if _active_run is self:
+                _active_run = None
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        self.seconds = round(time.perf_counter() - self._started, 4)
+        self.status = "failed" if exc_type else "success"
+        if self.metrics_dir:
+            self.write()
+
+    def record(self, stage):
+        with self._lock:
+            self.stages.append(stage)
+        logger.info(json.dumps({"run_id": self.run_id, **stage}, default=str))
+
+    def summary(self):
+        """JSON-serializable view of the run (what is written to disk and pushed to XCom)."""
+        with self._lock:
+            stages = list(self.stages)
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "status": self.status,
+            "seconds": self.seconds,
+            "stages": stages,
+        }
+
+    def write(self):
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = os.path.join(self.metrics_dir, f"{self.run_id}.json")
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2, default=str)
+        return path
+
+    def push_to_xcom(self, task_instance, key=XCOM_KEY):
+        task_instance.xcom_push(key=key, value=self.summary())
+
+def active_run():
+    return _active_run
+
+@contextlib.contextmanager
+def track(stage, rows_in=None, **fields):
+    """Time a pipeline stage and record it into the active RunMetrics, if any.
+
+    Yields a dict the caller can add to (set "rows_out" to get rows dropped and
+    rows per second). Without an active run this is nearly free and records nothing.
+    """
+    run = _active_run
+    record = {"stage": stage, "rows_in": rows_in, **fields}
+    if run is None:
+        yield record
+        return
+
+    rss_before = current_rss_mb()
+    record["started_at"] = datetime.now(timezone.utc).isoformat()
+    started = time.perf_counter()
+    try:
+        yield record
+        record["status"] = "success"
+    except BaseException:
+        record["status"] = "failed"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        record["seconds"] = round(elapsed, 4)
+        record["rss_delta_mb"] = round(current_rss_mb() - rss_before, 1)
+        rows_out = record.get("rows_out")
+        if rows_out is not None:
+            if rows_in is not None:
+                record["rows_dropped"] = max(rows_in - rows_out, 0)
+            if elapsed > 0:
+                record["rows_per_sec"] = round(rows_out / elapsed)
+        run.record(record)
+
+def instrumented(func):
+    """Track a `func(df, ...) -> df` step under its own name, counting rows in and out."""
+    @functools.wraps(func)
+    def wrapper(df, *args, **kwargs):
+        with track(func.__name__, rows_in=None if df is None else len(df)) as record:
+            result = func(df, *args, **kwargs)
+            record["rows_out"] = None if result is None else len(result)
+        return result
+    return wrapper
@@ -0,0 +1,169 @@
+# scripts/order_partitions.py
+#
+# Streaming mode's join of sales_transactions and payments, without holding either
+# table in memory whole:
+#
+#   1. both tables are streamed chunk by chunk, deduplicated across chunks and split
+#      into the same hash partitions on order_id (see parallel.partition_positions),
+#      each partition spilled to its own Parquet files;
+#   2. each partition's sales and payments are read back together, cleaned, joined
+#      and churn-flagged into one slice of sales_mart.
+#
+# Every order's sale and payments land in the same partition, so the slices add up to
+# the sales_mart transform_all builds. Peak memory is set by the size of one partition:
+# the deduplicators' seen hashes and the values the payments fill statistics are taken
+# over are spilled next to the partitions as well.
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.cleaning import CLEANING_SPECS, apply_cleaning_spec, drop_incomplete
+from scripts.dedup import ChunkDeduplicator
+from scripts.parallel import PARTITION_KEY, partition_positions
+from scripts.schemas import concat_frames
+from scripts.transform_data import CHURN_WINDOW_DAYS, build_sales_mart, clean_sales_transaction, flag_churned
+
+def partition_count(rows, rows_per_partition):
+    """Partitions needed for `rows` rows to average at most `rows_per_partition` each."""
+    return max(1, -(-rows // rows_per_partition))
+
+class OrderPartitions:
+    """Chunks of tables hash-partitioned on order_id, spilled to Parquet under `directory`."""
+
+    def __init__(self, directory, partitions):
+        self.directory = directory
+        self.partitions = partitions
+        self._chunks = {}
+        self._empty = {}
+
+    def _partition_dir(self, table_name, partition):
+        return os.path.join(self.directory, table_name, f"part-{partition:05d}")
+
+    def write(self, table_name, chunk):
+        """Split `chunk` of `table_name` over the partitions, one file per partition it has rows in."""
+        chunk_number = self._chunks.get(table_name, 0)
+        self._chunks[table_name] = chunk_number + 1
+        self._empty.setdefault(table_name, chunk.iloc[:0])
+        for partition, rows in enumerate(partition_positions(chunk[PARTITION_KEY], self.partitions)):
+            if not len(rows):
+                continue
+            partition_dir = self._partition_dir(table_name, partition)
+            os.makedirs(partition_dir, exist_ok=True)
+            chunk.take(rows).to_parquet(os.path.join(partition_dir, f"chunk-{chunk_number:06d}.parquet"), index=False)
+
+    def read(self, table_name, partition):
+        """The rows of `table_name` in `partition`, in stream order."""
+        paths = sorted(glob.glob(os.path.join(self._partition_dir(table_name, partition), "*.parquet")))
+        if not paths:
+            return self._empty[table_name]
+        return concat_frames([pd.read_parquet(path) for path in paths])
+
+def _kth_smallest(runs, k):
+    # The k-th (0-based) smallest value of the union of the sorted arrays `runs`:
+    # narrow a window per run around it, pivoting on the middle of the widest window
+    lo = [0] * len(runs)
+    hi = [len(run) for run in runs]
+    while True:
+        widest = max(range(len(runs)), key=lambda i: hi[i] - lo[i])
+        pivot = runs[widest][(lo[widest] + hi[widest]) // 2]
+        below = [int(np.searchsorted(run, pivot, "left")) for run in runs]
+        through = [int(np.searchsorted(run, pivot, "right")) for run in runs]
+        if sum(below) > k:
+            hi = [min(h, b) for h, b in zip(hi, below)]
+        elif sum(through) <= k:
+            lo = [max(l, t) for l, t in zip(lo, through)]
+        else:
+            return pivot
+
+class SpilledColumnStats:
+    """The fill statistics of a cleaning spec, over a table streamed chunk by chunk.
+
+    Means are kept as running sums. For medians each chunk's values are spilled to
+    `directory` as a sorted run, and the middle values are selected across the
+    memory-mapped runs at the end, so the column is never held in memory whole.
+    """
+
+    def __init__(self, directory, spec):
+        self.directory = directory
+        self.spec = spec
+        self.columns = list(dict.fromkeys(spec["required"] + list(spec["fill_stats"])))
+        self._sums = {col: 0.0 for col in spec["fill_stats"]}
+        self._counts = {col: 0 for col in spec["fill_stats"]}
+        self._runs = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _run_path(self, col, run):
+        return os.path.join(self.directory, f"{col}-{run:06d}.npy")
+
+    def add(self, chunk):
+        chunk = drop_incomplete(chunk[self.columns], self.spec)
+        for col, how in self.spec["fill_stats"].items():
+            values = chunk[col].dropna().to_numpy(dtype=float)
+            self._sums[col] += values.sum()
+            self._counts[col] += len(values)
+            if how == "median":
+                np.save(self._run_path(col, self._runs), np.sort(values))
+        self._runs += 1
+
+    def _median(self, col):
+        runs = [np.load(self._run_path(col, run), mmap_mode="r") for run in range(self._runs)]
+        runs = [run for run in runs if len(run)]
+        n = self._counts[col]
+        middle = _kth_smallest(runs, n // 2)
+        if n % 2:
+            return middle
+        return (_kth_smallest(runs, n // 2 - 1) + middle) / 2
+
+    def stats(self):
+        """The statistics, as column_stats would compute them over the whole table."""
+        stats = {}
+        for col, how in self.spec["fill_stats"].items():
+            if not self._counts[col]:
+                stats[col] = np.nan
+            elif how == "mean":
+                stats[col] = self._sums[col] / self._counts[col]
+            else:
+                stats[col] = self._median(col)
+        return stats
+
+def partition_sales_and_payments(sales_chunks, payment_chunks, order_partitions):
+    """First pass: spill deduplicated sales and payments into `order_partitions`.
+
+    Sales chunks are cleaned before they are spilled. Payments are cleaned per
+    partition later, with fill statistics of the whole deduplicated table; those are
+    returned, as apply_cleaning_spec takes them.
+    """
+    seen_dir = os.path.join(order_partitions.directory, "seen")
+    deduplicator = ChunkDeduplicator("sales_transactions", directory=os.path.join(seen_dir, "sales_transactions"))
+    for chunk in sales_chunks:
+        chunk = clean_sales_transaction(deduplicator.drop_seen(chunk), "sales_transactions")
+        order_partitions.write("sales_transactions", chunk)
+    print(f"[Dedup] sales_transactions: {deduplicator.duplicates} duplicate rows removed")
+
+    deduplicator = ChunkDeduplicator("payments", directory=os.path.join(seen_dir, "payments"))
+    payments_stats = SpilledColumnStats(os.path.join(order_partitions.directory, "stats"), CLEANING_SPECS["payments"])
+    for chunk in payment_chunks:
+        chunk = deduplicator.drop_seen(chunk)
+        order_partitions.write("payments", chunk)
+        payments_stats.add(chunk)
+    print(f"[Dedup] payments: {deduplicator.duplicates} duplicate rows removed")
+    return payments_stats.stats()
+
+def transform_sales_partitions(
+    order_partitions, customers, products, payments_stats, customer_last_order, churn_window_days=CHURN_WINDOW_DAYS
+):
+    """Second pass: yield one cleaned, joined and churn-flagged sales_mart slice per partition.
+
+    `customers` and `products` must already be deduplicated and cleaned; they stay
+    resident for the whole stream.
+    """
+    for partition in range(order_partitions.partitions):
+        sales = order_partitions.read("sales_transactions", partition)
+        payments = apply_cleaning_spec(
+            order_partitions.read("payments", partition), CLEANING_SPECS["payments"], payments_stats
+        )
+        sales_mart = build_sales_mart(sales, customers, products, payments)
+        yield flag_churned(sales_mart, customer_last_order, churn_window_days)
@@ -0,0 +1,152 @@
+# scripts/parallel.py
+#
+# Multi-process variant of transform_all, for hosts with more cores than tables:
+#
+#   - customers, products, marketing_ads and customer_support are deduplicated and
+#     cleaned concurrently, one pool task each;
+#   - sales_transactions and payments are split into hash partitions on order_id, the
+#     key joining them, and each partition is cleaned, joined into its slice of
+#     sales_mart and reduced to per-customer last order dates in its own task.
+#
+# The result is identical to transform_all: table-wide fill statistics are computed
+# once before partitioning, and the sales_mart partitions are put back in serial order.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scripts.cleaning import CLEANING_SPECS, apply_cleaning_spec, column_stats, drop_incomplete
+from scripts.customer_activity import last_order_dates
+from scripts.dedup import deduplicate
+from scripts.metrics import track
+from scripts.pipeline_tasks import CLEANERS
+from scripts.schemas import STRING_DTYPE, concat_frames
+from scripts.transform_data import (
+    CHURN_WINDOW_DAYS,
+    build_marketing_mart,
+    build_sales_mart,
+    build_support_mart,
+    flag_churned,
+)
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Key the fact tables are hash-partitioned on; equal keys always share a partition
+PARTITION_KEY = "order_id"
+
+# Original position of each sales row, carried through a partition to restore order
+ROW_POSITION = "_row_position"
+
+def partition_positions(keys, partitions):
+    """Row positions of each of `partitions` hash partitions of `keys`, in row order."""
+    # Hash one dtype on both sides so an order_id lands in the same partition in every table
+    hashes = pd.util.hash_pandas_object(keys.astype(STRING_DTYPE), index=False).to_numpy()
+    codes = hashes % np.uint64(partitions)
+    order = np.argsort(codes, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(codes, minlength=partitions))[:-1])
+
+def table_stats(df, table_name):
+    """The fill statistics of the whole (deduplicated) table, as apply_cleaning_spec takes them."""
+    spec = CLEANING_SPECS[table_name]
+    if not spec["fill_stats"]:
+        return {}
+    columns = list(dict.fromkeys(spec["required"] + list(spec["fill_stats"])))
+    return column_stats(drop_incomplete(df[columns], spec), spec)
+
+def _dedup_and_clean(df, table_name):
+    return CLEANERS[table_name](deduplicate(df, table_name), table_name)
+
+def _build_sales_partition(sales, payments, customers, products, payments_stats):
+    # One partition: clean its sales and payments, join them and aggregate last orders
+    sales = apply_cleaning_spec(sales, CLEANING_SPECS["sales_transactions"])
+    payments = apply_cleaning_spec(payments, CLEANING_SPECS["payments"], payments_stats)
+    sales_mart = build_sales_mart(sales, customers, products, payments)
+    return sales_mart, last_order_dates(sales)
+
+def build_sales_mart_parallel(pool, sales, payments, customers, products, partitions):
+    """sales_mart (without churn) and last order dates, built over hash partitions.
+
+    `sales` and `payments` must be deduplicated; `customers` and `products` cleaned.
+    """
+    payments_stats = table_stats(payments, "payments")
+    sales = sales.assign(**{ROW_POSITION: np.arange(len(sales))})
+    sales_parts = partition_positions(sales[PARTITION_KEY], partitions)
+    payments_parts = partition_positions(payments[PARTITION_KEY], partitions)
+
+    futures = [
+        pool.submit(
+            _build_sales_partition,
+            sales.take(sales_rows), payments.take(payments_rows), customers, products, payments_stats,
+        )
+        for sales_rows, payments_rows in zip(sales_parts, payments_parts)
+    ]
+    results = [future.result() for future in futures]
+
+    # Partitions only gain a fill value as a category if they had a gap to fill
+    sales_mart = concat_frames([mart for mart, _ in results])
+    # Back to serial order: by sales row, a row's payment matches already being in order
+    order = np.argsort(sales_mart[ROW_POSITION].to_numpy(), kind="stable")
+    sales_mart = sales_mart.take(order).drop(columns=ROW_POSITION).reset_index(drop=True)
+    customer_last_order = pd.concat([last_order for _, last_order in results]).groupby(level=0).max()
+    return sales_mart, customer_last_order
+
+def transform_all_parallel(
+    customers,
+    sales,
+    products,
+    payments,
+    marketing_ads,
+    customer_support,
+    customer_last_order=None,
+    churn_window_days=CHURN_WINDOW_DAYS,
+    workers=DEFAULT_WORKERS,
+):
+    """transform_all spread over a pool of `workers` processes; returns the same marts."""
+    print(f"🔄 Starting parallel transformation process ({workers} workers)...")
+
+    # Fresh interpreters: forking would copy pyarrow's thread pools in an unknown state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        with track("clean_dimensions_parallel", workers=workers):
+            cleaned = {
+                table_name: pool.submit(_dedup_and_clean, df, table_name)
+                for table_name, df in [
+                    ("customers", customers),
+                    ("products", products),
+                    ("marketing_ads", marketing_ads),
+                    ("customer_support", customer_support),
+                ]
+            }
+            # Partitioning by order_id would split payment_id duplicates, so the fact
+            # tables are deduplicated whole while the dimensions are cleaned
+            sales = deduplicate(sales, "sales_transactions")
+            payments = deduplicate(payments, "payments")
+            customers = cleaned["customers"].result()
+            products = cleaned["products"].result()
+
+        print(f"🔁 Merging datasets for sales_mart in {workers} partitions...")
+        with track("build_sales_mart_parallel", rows_in=len(sales), workers=workers) as record:
+            sales_mart, partition_last_order = build_sales_mart_parallel(
+                pool, sales, payments, customers, products, workers
+            )
+            record["rows_out"] = len(sales_mart)
+
+        print("📆 Flagging churned customers...")
+        if "order_date" in sales_mart.columns:
+            if customer_last_order is None:
+                customer_last_order = partition_last_order
+            sales_mart = flag_churned(sales_mart, customer_last_order, churn_window_days)
+        else:
+            sales_mart["churned"] = False
+
+        print("📊 Creating marketing_mart...")
+        marketing_mart = build_marketing_mart(cleaned["marketing_ads"].result())
+
+        print("💬 Creating support_mart...")
+        support_mart = build_support_mart(cleaned["customer_support"].result())
+
+    print("✅ Transformation complete.")
+    return sales_mart, marketing_mart, support_mart
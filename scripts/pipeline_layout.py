@@ -0,0 +1,36 @@
+# scripts/pipeline_layout.py
+#
+# The pipeline's tables, marts and summary marts and what each is built from, as plain
+# constants. The Airflow scheduler imports this every time it parses
+# airflow_dags/etl_dag.py, so it must not pull in pandas, pyarrow or the database
+# drivers; scripts/pipeline_tasks.py attaches the functions that do the work.
+
+import os
+
+# Repository root: default data, cache, state and output directories live under it,
+# whatever directory the ETL or an Airflow worker is started from
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Source tables, in the order extract_all_data returns them
+SOURCE_TABLES = ["customers", "sales_transactions", "products", "payments", "marketing_ads", "customer_support"]
+
+# Cleaned tables each mart is built from
+MART_SOURCES = {
+    "sales_mart": ["sales_transactions", "customers", "products", "payments"],
+    "marketing_mart": ["marketing_ads"],
+    "support_mart": ["customer_support"],
+}
+
+# Daily sales rollups by table name, and the sales_mart column each one breaks down by
+SALES_ROLLUPS = {
+    "sales_daily_by_category": "category",
+    "sales_daily_by_location": "location",
+    "sales_daily_by_payment_method": "payment_method",
+}
+
+# Mart each summary mart is aggregated from
+SUMMARY_SOURCES = {
+    **{name: "sales_mart" for name in SALES_ROLLUPS},
+    "campaign_summary": "marketing_mart",
+    "support_summary": "support_mart",
+}
@@ -0,0 +1,165 @@
+# scripts/pipeline_tasks.py
+#
+# The ETL split into independently retryable steps, as run by airflow_dags/etl_dag.py:
+#
+#   extract_clean(table)  ->  build_mart(mart)  ->  load_mart(mart)
+#                                       |
+#                                       +->  build_summary(summary)  ->  load_mart(summary)
+#
+# Steps hand their results to each other as Parquet files under one work directory
+# per run, so a retried step re-reads its inputs from disk instead of recomputing them.
+# The work directory's run state (scripts/checkpoint.py) records finished steps and
+# committed load batches: rerunning a DAG run skips the steps that already finished,
+# and a retried load that already committed is not repeated.
+
+import os
+import shutil
+
+from scripts.checkpoint import RunCheckpoint, read_frame, run_directory, write_frame
+from scripts.dedup import deduplicate
+from scripts.extract_data import extract_table
+from scripts.load_to_postgres import DEFAULT_DB_URL, PostgresLoader
+from scripts.pipeline_layout import MART_SOURCES, PROJECT_DIR, SALES_ROLLUPS, SUMMARY_SOURCES
+from scripts.source_manifest import DEFAULT_DATA_PATH
+from scripts.staging_cache import DEFAULT_STAGING_DIR
+from scripts.summary_marts import build_campaign_summary, build_sales_rollup, build_support_summary
+from scripts.transform_data import (
+    build_marketing_mart,
+    build_sales_mart,
+    build_support_mart,
+    clean_customer,
+    clean_customers_sup,
+    clean_marketing_ads,
+    clean_payments,
+    clean_products,
+    clean_sales_transaction,
+    flag_churned,
+    last_order_dates,
+)
+
+DEFAULT_WORK_DIR = os.path.join(PROJECT_DIR, ".work")
+
+CLEANERS = {
+    "customers": clean_customer,
+    "sales_transactions": clean_sales_transaction,
+    "products": clean_products,
+    "payments": clean_payments,
+    "marketing_ads": clean_marketing_ads,
+    "customer_support": clean_customers_sup,
+}
+
+def _build_sales_mart(tables):
+    sales = tables["sales_transactions"]
+    sales_mart = build_sales_mart(sales, tables["customers"], tables["products"], tables["payments"])
+    return flag_churned(sales_mart, last_order_dates(sales))
+
+# Cleaned tables each mart is built from, and how
+MARTS = {
+    "sales_mart": (MART_SOURCES["sales_mart"], _build_sales_mart),
+    "marketing_mart": (MART_SOURCES["marketing_mart"], lambda tables: build_marketing_mart(tables["marketing_ads"])),
+    "support_mart": (MART_SOURCES["support_mart"], lambda tables: build_support_mart(tables["customer_support"])),
+}
+
+# Row-level mart each summary mart is aggregated from, and how
+SUMMARIES = {
+    **{
+        name: (SUMMARY_SOURCES[name], lambda sales_mart, dimension=dimension: build_sales_rollup(sales_mart, dimension))
+        for name, dimension in SALES_ROLLUPS.items()
+    },
+    "campaign_summary": (SUMMARY_SOURCES["campaign_summary"], build_campaign_summary),
+    "support_summary": (SUMMARY_SOURCES["support_summary"], build_support_summary),
+}
+
+# How a full rebuild of each mart replaces the previous one, atomically and
+# idempotently: sales_mart partition by partition, the others as whole tables
+MART_LOAD_OPTIONS = {
+    "sales_mart": {"partitions": "month", "replace": True},
+    "marketing_mart": {"staging": True, "replace": True},
+    "support_mart": {"staging": True, "replace": True},
+    **{name: {"staging": True, "replace": True} for name in SALES_ROLLUPS},
+    "campaign_summary": {"staging": True, "replace": True},
+    "support_summary": {"staging": True, "replace": True},
+}
+
+def run_work_dir(run_id, work_root=DEFAULT_WORK_DIR):
+    """Directory holding one run's intermediate files."""
+    return run_directory(work_root, run_id)
+
+def _finished(checkpoint, step):
+    # Rows a step produced in an earlier attempt of this run, or None if it has not finished
+    if not checkpoint.stage_done(step):
+        return None
+    print(f"[Checkpoint] Skipping {step}: already finished in this run")
+    return checkpoint.stage_info(step)["rows"]
+
+def cleaned_path(work_dir, table_name):
+    return os.path.join(work_dir, "clean", f"{table_name}.parquet")
+
+def mart_path(work_dir, mart_name):
+    return os.path.join(work_dir, "marts", f"{mart_name}.parquet")
+
+def extract_clean(
+    table_name,
+    work_dir,
+    data_path=DEFAULT_DATA_PATH,
+    csv_engine="c",
+    staging_dir=DEFAULT_STAGING_DIR,
+    source_manifest=None,
+):
+    """Extract, deduplicate and clean one source table into the run's work dir."""
+    checkpoint = RunCheckpoint(work_dir)
+    step = f"extract_clean_{table_name}"
+    rows = _finished(checkpoint, step)
+    if rows is not None:
+        return rows
+    df = extract_table(table_name, data_path, csv_engine, staging_dir, source_manifest)
+    df = deduplicate(df, table_name)
+    df = CLEANERS[table_name](df, table_name)
+    write_frame(df, cleaned_path(work_dir, table_name))
+    checkpoint.finish_stage(step, rows=len(df))
+    return len(df)
+
+def build_mart(mart_name, work_dir):
+    """Build one mart from the cleaned tables it depends on."""
+    checkpoint = RunCheckpoint(work_dir)
+    step = f"build_{mart_name}"
+    rows = _finished(checkpoint, step)
+    if rows is not None:
+        return rows
+    sources, builder = MARTS[mart_name]
+    tables = {table_name: read_frame(cleaned_path(work_dir, table_name)) for table_name in sources}
+    print(f"🔁 Building {mart_name} from {', '.join(sources)}...")
+    mart = builder(tables)
+    write_frame(mart, mart_path(work_dir, mart_name))
+    checkpoint.finish_stage(step, rows=len(mart))
+    return len(mart)
+
+def build_summary(summary_name, work_dir):
+    """Aggregate one summary mart from its built row-level mart."""
+    checkpoint = RunCheckpoint(work_dir)
+    step = f"build_{summary_name}"
+    rows = _finished(checkpoint, step)
+    if rows is not None:
+        return rows
+    mart_name, builder = SUMMARIES[summary_name]
+    print(f"📈 Building {summary_name} from {mart_name}...")
+    summary = builder(read_frame(mart_path(work_dir, mart_name)))
+    write_frame(summary, mart_path(work_dir, summary_name))
+    checkpoint.finish_stage(step, rows=len(summary))
+    return len(summary)
+
+def load_mart(mart_name, work_dir, db_url=DEFAULT_DB_URL):
+    """Replace one mart (or summary mart) in PostgreSQL with the built one in a single transaction.
+
+    Safe to retry: a rerun swaps in the same rows instead of appending them again, and
+    skips the load if this run already committed it.
+    """
+    mart = read_frame(mart_path(work_dir, mart_name))
+    with PostgresLoader(db_url, max_connections=1, checkpoint=RunCheckpoint(work_dir)) as loader:
+        loader.create_tables([mart_name])
+        loader.load(mart, mart_name, **MART_LOAD_OPTIONS[mart_name])
+    return len(mart)
+
+def cleanup(work_dir):
+    """Remove a finished run's intermediate files."""
+    shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,154 @@
+# scripts/polars_backend.py
+#
+# The transform stage on Polars LazyFrames, selected with `run_etl --backend polars`.
+# It implements the same CLEANING_SPECS, dedup keys, joins and churn rule as the
+# pandas path in scripts/transform_data.py, as lazy queries that Polars optimizes and
+# runs multithreaded (only tables with fill statistics are materialized early). The
+# marts come back as Arrow tables, which the loader streams to COPY without converting
+# them to pandas.
+
+import pandas as pd
+
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
+
+from scripts.cleaning import CLEANING_SPECS, column_stats
+from scripts.dedup import DEDUP_KEYS
+from scripts.transform_data import CHURN_WINDOW_DAYS
+
+def to_lazy(df):
+    """A pandas DataFrame as a Polars LazyFrame (NaN becomes null, as pandas treats it)."""
+    return pl.from_pandas(df, nan_to_null=True).lazy()
+
+def deduplicate_lazy(lf, table_name):
+    """`lf` without repeated DEDUP_KEYS, keeping first occurrences (see dedup.deduplicate).
+
+    Rows with a missing key column are always kept.
+    """
+    keys = DEDUP_KEYS[table_name]
+    if keys is None:
+        return lf.filter(pl.struct(pl.all()).is_first_distinct())
+    missing_key = pl.any_horizontal(pl.col(key).is_null() for key in keys)
+    return lf.filter(missing_key | pl.struct(keys).is_first_distinct())
+
+def clean_lazy(lf, table_name):
+    """`lf` cleaned by the table's CLEANING_SPECS entry (see cleaning.apply_cleaning_spec).
+
+    Statistics are taken after dropping incomplete rows, like the pandas path. They are
+    computed by pandas itself on the materialized rows: Polars sums in a different
+    order, which would change means in the last digit.
+    """
+    spec = CLEANING_SPECS[table_name]
+    if spec["required"]:
+        lf = lf.filter(pl.all_horizontal(pl.col(col).is_not_null() for col in spec["required"]))
+
+    fills = [pl.col(col).fill_null(value) for col, value in spec["fill"].items()]
+    if spec["fill_stats"]:
+        df = lf.collect()
+        stats = column_stats(df.select(list(spec["fill_stats"])).to_pandas(), spec)
+        lf = df.lazy()
+        fills += [pl.col(col).fill_null(value) for col, value in stats.items()]
+    fills += [pl.col(col).fill_null(pl.col(source)) for col, source in spec["fill_from"].items()]
+    if fills:
+        lf = lf.with_columns(fills)
+
+    schema = lf.collect_schema()
+    dates = [col for col in spec["dates"] if not isinstance(schema[col], pl.Datetime)]
+    if dates:
+        lf = lf.with_columns(pl.col(col).cast(pl.String).str.to_datetime(strict=False) for col in dates)
+    return lf
+
+def left_join(left, right, key):
+    """Left join keeping left row order, naming clashing columns like DataFrame.merge ("_x"/"_y")."""
+    clashes = (set(left.collect_schema().names()) & set(right.collect_schema().names())) - {key}
+    left = left.rename({col: f"{col}_x" for col in clashes})
+    right = right.rename({col: f"{col}_y" for col in clashes})
+    return left.join(right, on=key, how="left", maintain_order="left_right")
+
+def last_order_dates_lazy(sales):
+    return sales.group_by("customer_id").agg(pl.col("order_date").max().alias("last_order_date"))
+
+def flag_churned_lazy(sales_mart, customer_last_order, window_days=CHURN_WINDOW_DAYS):
+    """Add `churned`: the customer's last order is over `window_days` before the latest order."""
+    cutoff = pl.col("last_order_date").max() - pl.duration(days=window_days)
+    churned = customer_last_order.select(
+        "customer_id", (pl.col("last_order_date") < cutoff).alias("churned")
+    )
+    return (
+        sales_mart.join(churned, on="customer_id", how="left", maintain_order="left")
+        .with_columns(pl.col("churned").fill_null(False))
+    )
+
+def transform_all_polars(
+    customers,
+    sales,
+    products,
+    payments,
+    marketing_ads,
+    customer_support,
+    customer_last_order=None,
+    churn_window_days=CHURN_WINDOW_DAYS,
+):
+    """transform_all on Polars: takes the extracted pandas frames, returns three Arrow tables.
+
+    `customer_last_order` is an optional pandas Series of last order date by customer_id,
+    as for transform_all.
+    """
+    if not HAS_POLARS:
+        raise ImportError("The polars backend needs the polars package (pip install polars)")
+    print("🔄 Starting full transformation process (polars)...")
+
+    tables = {
+        "customers": customers,
+        "sales_transactions": sales,
+        "products": products,
+        "payments": payments,
+        "marketing_ads": marketing_ads,
+        "customer_support": customer_support,
+    }
+    cleaned = {
+        table_name: clean_lazy(deduplicate_lazy(to_lazy(df), table_name), table_name)
+        for table_name, df in tables.items()
+    }
+
+    print("🔁 Merging datasets for sales_mart...")
+    sales_mart = cleaned["sales_transactions"]
+    for table_name, key in [("customers", "customer_id"), ("products", "product_id"), ("payments", "order_id")]:
+        sales_mart = left_join(sales_mart, cleaned[table_name], key)
+    if {"quantity", "price"} <= set(sales_mart.collect_schema().names()):
+        sales_mart = sales_mart.with_columns((pl.col("quantity") * pl.col("price")).alias("revenue"))
+    else:
+        sales_mart = sales_mart.with_columns(pl.lit(None).alias("revenue"))
+
+    print("📆 Flagging churned customers...")
+    if customer_last_order is None:
+        last_order = last_order_dates_lazy(cleaned["sales_transactions"])
+    else:
+        last_order = to_lazy(
+            pd.DataFrame({
+                "customer_id": customer_last_order.index.astype(str),
+                "last_order_date": customer_last_order.to_numpy(),
+            })
+        )
+    sales_mart = flag_churned_lazy(sales_mart, last_order, churn_window_days)
+
+    print("📊 Creating marketing_mart...")
+    marketing_ads = cleaned["marketing_ads"]
+    if {"clicks", "cost_per_click"} <= set(marketing_ads.collect_schema().names()):
+        marketing_mart = marketing_ads.with_columns((pl.col("clicks") * pl.col("cost_per_click")).alias("cost"))
+    else:
+        marketing_mart = marketing_ads.with_columns(pl.lit(None).alias("cost"))
+
+    print("💬 Creating support_mart...")
+    support_mart = cleaned["customer_support"]
+
+    # Collected together so the cleaned tables shared by the queries are computed once
+    sales_mart, marketing_mart, support_mart = pl.collect_all([sales_mart, marketing_mart, support_mart])
+    print("✅ Transformation complete.")
+    return tuple(
+        mart.to_arrow(compat_level=pl.CompatLevel.oldest())
+        for mart in (sales_mart, marketing_mart, support_mart)
+    )
@@ -1,21 +1,514 @@
 # run_etl.py
 
-from scripts.extract_data import extract_all_data
-from scripts.transform_data import transform_all
-from scripts.load_to_postgres import load_to_postgres
+import argparse
+import logging
+import tempfile
 
-if __name__ == "__main__":
-    # Extract
-    customers, sales, products, payments, marketing_ads, customer_support = extract_all_data()
+import pandas as pd
+
+from scripts.extract_data import (
+    SALES_CHUNK_SIZE,
+    SOURCE_TABLES,
+    extract_all_data,
+    extract_dimensions,
+    extract_tables,
+    iter_sales_chunks,
+    iter_table_chunks,
+)
+from scripts.transform_data import (
+    CHURN_WINDOW_DAYS,
+    SALES_REQUIRED_COLUMNS,
+    build_marketing_mart,
+    build_support_mart,
+    clean_all,
+    clean_customer,
+    clean_customers_sup,
+    clean_marketing_ads,
+    clean_products,
+    scan_last_order_dates,
+    transform_all,
+)
+from scripts.checkpoint import RunCheckpoint, checkpointed, input_run_id
+from scripts.customer_activity import CustomerActivityStore
+from scripts.dedup import deduplicate
+from scripts.elt import build_marts_in_database, with_table_key
+from scripts.incremental import (
+    DEFAULT_STATE_DIR,
+    WATERMARK_COLUMNS,
+    WatermarkStore,
+    extract_incremental_batch,
+    file_fingerprints,
+    select_incremental_batch,
+)
+from scripts.load_to_postgres import DEFAULT_DB_URL, PostgresLoader
+from scripts.metrics import DEFAULT_METRICS_DIR, RunMetrics
+from scripts.order_partitions import (
+    OrderPartitions,
+    partition_count,
+    partition_sales_and_payments,
+    transform_sales_partitions,
+)
+from scripts.parallel import transform_all_parallel
+from scripts.pipeline_tasks import MART_LOAD_OPTIONS, SUMMARIES
+from scripts.polars_backend import transform_all_polars
+from scripts.source_manifest import DEFAULT_DATA_PATH, load_manifest, resolve_sources
+from scripts.sql_schema import table_key
+from scripts.staging_cache import DEFAULT_STAGING_DIR
+from scripts.summary_marts import (
+    SALES_ROLLUPS,
+    build_campaign_summary,
+    build_sales_rollups,
+    build_summary_marts,
+    build_support_summary,
+    combine_sales_rollups,
+    read_sales_days,
+    read_support_mart,
+    sales_days,
+)
+
+# transform_all implementations by --backend; all build the same marts
+TRANSFORM_BACKENDS = {
+    "pandas": transform_all,
+    "polars": transform_all_polars,
+}
+
+MART_TABLES = ["sales_mart", "marketing_mart", "support_mart", *SUMMARIES]
+
+def run_batch_etl(
+    data_path=DEFAULT_DATA_PATH,
+    db_url=DEFAULT_DB_URL,
+    max_connections=3,
+    csv_engine="c",
+    staging_dir=DEFAULT_STAGING_DIR,
+    churn_window_days=CHURN_WINDOW_DAYS,
+    workers=1,
+    backend="pandas",
+    source_manifest=None,
+    checkpoint=None,
+):
+    """Extract every table, build the marts in memory and replace them in PostgreSQL.
+
+    With a `checkpoint` (RunCheckpoint), the extracted tables and the built marts are
+    saved as Parquet once each stage finishes, and every committed load is recorded:
+    rerunning a failed run skips the finished stages and the marts already loaded.
+    """
+    # Extract (unchanged CSVs are served from the Parquet staging cache)
+    def extract():
+        tables = extract_all_data(data_path, csv_engine, staging_dir, source_manifest)
+        return dict(zip(SOURCE_TABLES, tables))
+
+    tables = checkpointed(checkpoint, "extract", extract)
+
+    # Transform, across a process pool when more than one pandas worker is asked for
+    def transform():
+        if backend == "pandas" and workers > 1:
+            sales_mart, marketing_mart, support_mart = transform_all_parallel(
+                *(tables[table_name] for table_name in SOURCE_TABLES),
+                churn_window_days=churn_window_days, workers=workers,
+            )
+        else:
+            sales_mart, marketing_mart, support_mart = TRANSFORM_BACKENDS[backend](
+                *(tables[table_name] for table_name in SOURCE_TABLES),
+                churn_window_days=churn_window_days,
+            )
+        return {
+            "sales_mart": sales_mart,
+            "marketing_mart": marketing_mart,
+            "support_mart": support_mart,
+            # Dashboard aggregates, from the marts while they are still in memory
+            **build_summary_marts(sales_mart, marketing_mart, support_mart),
+        }
+
+    marts = checkpointed(checkpoint, "transform", transform)
+
+    # Load to PostgreSQL: the marts are independent, so load them concurrently.
+    # Each replaces its previous contents in one transaction, so a rerun is idempotent
+    with PostgresLoader(db_url, max_connections=max_connections, checkpoint=checkpoint) as loader:
+        loader.create_tables(MART_TABLES)
+        loader.load_many(marts, table_options=MART_LOAD_OPTIONS)
+
+def run_streaming_etl(
+    data_path=DEFAULT_DATA_PATH,
+    chunksize=SALES_CHUNK_SIZE,
+    db_url=DEFAULT_DB_URL,
+    max_connections=3,
+    csv_engine="c",
+    staging_dir=DEFAULT_STAGING_DIR,
+    churn_window_days=CHURN_WINDOW_DAYS,
+    source_manifest=None,
+    checkpoint=None,
+):
+    """Stream sales_transactions and payments through transform and load in bounded-size pieces.
+
+    customers and products are cleaned once and kept resident as join lookups. Sales
+    and payments are streamed in chunks of `chunksize` rows into hash partitions on
+    order_id spilled to disk (see scripts/order_partitions.py), about `chunksize` sales
+    rows per partition, and sales_mart is joined and loaded partition by partition; peak
+    memory is set by `chunksize`, not by the size of either table.
+
+    With a `checkpoint`, the cleaned tables and last order dates are saved as Parquet
+    and every committed sales_mart partition is recorded; a rerun of the run (same
+    sources and chunksize) still streams every partition but only loads those not
+    committed yet.
+    """
+    # Extract, deduplicate and clean the resident tables
+    def clean_dimensions():
+        customers, products, marketing_ads, customer_support = extract_dimensions(
+            data_path, csv_engine, staging_dir, source_manifest
+        )
+        return {
+            "customers": clean_customer(deduplicate(customers, "customers"), "customers"),
+            "products": clean_products(deduplicate(products, "products"), "products"),
+            "marketing_ads": clean_marketing_ads(deduplicate(marketing_ads, "marketing_ads"), "marketing_ads"),
+            "customer_support": clean_customers_sup(
+                deduplicate(customer_support, "customer_support"), "customer_support"
+            ),
+        }
 
-    # Transform
-    sales_mart, marketing_mart, support_mart = transform_all(
-        customers, sales, products, payments, marketing_ads, customer_support
+    cleaned = checkpointed(checkpoint, "clean", clean_dimensions)
+    customers, products = cleaned["customers"], cleaned["products"]
+
+    # Pass 1: churn needs every customer's last order before any partition can be
+    # flagged; the number of sales rows sets the number of partitions
+    def scan_last_orders():
+        print("📆 Scanning sales for last order dates...")
+        sales_rows = 0
+
+        def counted(chunks):
+            nonlocal sales_rows
+            for chunk in chunks:
+                sales_rows += len(chunk)
+                yield chunk
+
+        customer_last_order = scan_last_order_dates(
+            counted(iter_sales_chunks(data_path, chunksize, usecols=SALES_REQUIRED_COLUMNS, manifest=source_manifest))
+        )
+        return {
+            "last_order": customer_last_order.rename_axis("customer_id").reset_index(name="last_order_date"),
+            "sales_rows": pd.DataFrame({"sales_rows": [sales_rows]}),
+        }
+
+    scanned = checkpointed(checkpoint, "scan_last_orders", scan_last_orders)
+    customer_last_order = scanned["last_order"].set_index("customer_id")["last_order_date"]
+    partitions = partition_count(int(scanned["sales_rows"]["sales_rows"].iloc[0]), chunksize)
+
+    # Pass 2: spill sales and payments into partitions on order_id, then join and
+    # append sales_mart partition by partition
+    print(f"🔁 Streaming sales_mart in {partitions} partitions...")
+    with tempfile.TemporaryDirectory(prefix="order_partitions_") as spill_dir, PostgresLoader(
+        db_url, max_connections=max_connections, checkpoint=checkpoint
+    ) as loader:
+        # sales_mart partitions are upserted into its order_date partitions, so a rerun
+        # overwrites the rows of the previous one instead of duplicating them
+        loader.create_tables(MART_TABLES)
+        order_partitions = OrderPartitions(spill_dir, partitions)
+        payments_stats = partition_sales_and_payments(
+            iter_sales_chunks(data_path, chunksize, manifest=source_manifest),
+            iter_table_chunks("payments", data_path, chunksize, manifest=source_manifest),
+            order_partitions,
+        )
+        sales_marts = transform_sales_partitions(
+            order_partitions, customers, products, payments_stats, customer_last_order, churn_window_days
+        )
+        # Partitions hold disjoint orders, so each one's rollups are added to running
+        # totals (bounded by days x dimension values, not by the number of sales)
+        sales_rollups = None
+        for partition, sales_mart in enumerate(sales_marts):
+            loader.load(sales_mart, "sales_mart", keys=table_key("sales_mart"), batch=f"partition_{partition:05d}")
+            partition_rollups = build_sales_rollups(sales_mart)
+            if sales_rollups is None:
+                sales_rollups = partition_rollups
+            else:
+                sales_rollups = {
+                    name: combine_sales_rollups([sales_rollups[name], rollup])
+                    for name, rollup in partition_rollups.items()
+                }
+
+        marketing_mart = build_marketing_mart(cleaned["marketing_ads"])
+        support_mart = build_support_mart(cleaned["customer_support"])
+        loader.load_many(
+            {
+                "marketing_mart": marketing_mart,
+                "support_mart": support_mart,
+                **(sales_rollups or {}),
+                "campaign_summary": build_campaign_summary(marketing_mart),
+                "support_summary": build_support_summary(support_mart),
+            },
+            table_options=MART_LOAD_OPTIONS,
+        )
+
+def run_incremental_etl(
+    data_path=DEFAULT_DATA_PATH,
+    db_url=DEFAULT_DB_URL,
+    max_connections=3,
+    csv_engine="c",
+    staging_dir=DEFAULT_STAGING_DIR,
+    state_dir=DEFAULT_STATE_DIR,
+    churn_window_days=CHURN_WINDOW_DAYS,
+    backend="pandas",
+    source_manifest=None,
+):
+    """Rebuild and upsert only the mart rows touched since the last successful run.
+
+    sales_mart and support_mart are upserted on the keys declared in
+    sql2/create_tables.sql; marketing_mart has no watermark or key and is swapped in
+    whole. Churn is looked up in the customer-activity state, which only folds in this
+    run's sales. The daily sales rollups are re-aggregated for the order days this run
+    touched, from all loaded sales_mart rows of those days; the other summaries are
+    small and rebuilt whole. Once the customer activity exists, only the source files
+    changed since the last run are searched for new rows (see extract_incremental_batch).
+    Watermarks and state only advance once every load has committed.
+    """
+    watermarks = WatermarkStore(state_dir)
+    activity = CustomerActivityStore(state_dir)
+
+    # Without saved activity (first run, or state lost) it is rebuilt from every sale,
+    # so every source is read whole; otherwise only what the batch needs is extracted
+    full_history = len(activity) == 0
+    previous_last_order = activity.last_order
+    if full_history:
+        fingerprints = file_fingerprints(
+            path
+            for paths in resolve_sources(data_path, load_manifest(source_manifest), list(WATERMARK_COLUMNS)).values()
+            for path in paths
+        )
+        customers, sales, products, payments, marketing_ads, customer_support = extract_all_data(
+            data_path, csv_engine, staging_dir, source_manifest
+        )
+        activity.update(sales.dropna(subset=SALES_REQUIRED_COLUMNS), customers)
+        sales, payments, customer_support, marks = select_incremental_batch(
+            sales, payments, customer_support, watermarks
+        )
+    else:
+        dimensions = extract_tables(
+            ["customers", "products", "marketing_ads"], data_path, csv_engine, staging_dir, source_manifest
+        )
+        customers, products, marketing_ads = dimensions["customers"], dimensions["products"], dimensions["marketing_ads"]
+        sales, payments, customer_support, marks, fingerprints = extract_incremental_batch(
+            watermarks, data_path, csv_engine, staging_dir, source_manifest
+        )
+        activity.update(sales.dropna(subset=SALES_REQUIRED_COLUMNS), customers)
+
+    sales_mart, marketing_mart, support_mart = TRANSFORM_BACKENDS[backend](
+        customers, sales, products, payments, marketing_ads, customer_support,
+        customer_last_order=activity.last_order,
+        churn_window_days=churn_window_days,
     )
 
-    # Load to PostgreSQL (update db_url in load_to_postgres.py as needed)
-    load_to_postgres(sales_mart, "sales_mart")
-    load_to_postgres(marketing_mart, "marketing_mart")
-    load_to_postgres(support_mart, "support_mart")
+    with PostgresLoader(db_url, max_connections=max_connections) as loader:
+        loader.create_tables(MART_TABLES)
+        loader.load_many(
+            {
+                "sales_mart": sales_mart,
+                "marketing_mart": marketing_mart,
+                "support_mart": support_mart,
+            },
+            table_options={
+                # A rebuilt order replaces all of its old rows (e.g. its payment-less row)
+                "sales_mart": {"keys": table_key("sales_mart"), "replace_by": ["order_id"]},
+                "support_mart": {"keys": table_key("support_mart")},
+                "marketing_mart": {"staging": True, "replace": True},
+            },
+        )
+        # Re-flag rows of customers whose churn status moved with this run's orders
+        changed = activity.changed_flags(previous_last_order, churn_window_days)
+        if not full_history and len(changed):
+            loader.update(changed, "sales_mart", keys=["customer_id"])
+
+        # Summaries read the committed marts back, so they include earlier runs' rows
+        days = sales_days(sales_mart)
+        summaries = {
+            "campaign_summary": build_campaign_summary(marketing_mart),
+            "support_summary": build_support_summary(read_support_mart(loader.engine)),
+        }
+        if days:
+            summaries.update(build_sales_rollups(read_sales_days(loader.engine, days)))
+        loader.load_many(
+            summaries,
+            table_options={
+                **MART_LOAD_OPTIONS,
+                # A touched day's groups replace all of that day's old ones
+                **{name: {"keys": table_key(name), "replace_by": ["order_date"]} for name in SALES_ROLLUPS},
+            },
+        )
+
+    for source, mark in marks.items():
+        watermarks.update(source, mark)
+    watermarks.record_files(fingerprints)
+    watermarks.save()
+    activity.save()
+
+    churned = activity.churn_flags().sum()
+    print(
+        "[Incremental] Churned customers by window: "
+        + ", ".join(f"{col} {count}" for col, count in churned.items())
+        + f"; {activity.status_mismatches(churn_window_days)} disagree with churn_status"
+    )
+
+def run_elt(
+    data_path=DEFAULT_DATA_PATH,
+    db_url=DEFAULT_DB_URL,
+    max_connections=3,
+    csv_engine="c",
+    staging_dir=DEFAULT_STAGING_DIR,
+    source_manifest=None,
+):
+    """Load the cleaned raw tables and build the marts inside PostgreSQL.
+
+    Only the narrow cleaned tables cross the wire; the joins run in the database as
+    the materialized views of sql2/create_marts.sql.
+    """
+    tables = extract_all_data(data_path, csv_engine, staging_dir, source_manifest)
+    tables = clean_all(*tables)
+
+    with PostgresLoader(db_url, max_connections=max_connections) as loader:
+        loader.create_tables(SOURCE_TABLES)
+        # Truncate + COPY, not a table swap: the materialized views depend on these tables
+        loader.load_many(
+            {table_name: with_table_key(df, table_name) for table_name, df in zip(SOURCE_TABLES, tables)},
+            replace=True,
+        )
+        build_marts_in_database(loader.engine)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the retail ETL pipeline.")
+    parser.add_argument("--data-path", default=DEFAULT_DATA_PATH, help="Directory holding the source CSV files.")
+    parser.add_argument(
+        "--source-manifest",
+        default=None,
+        help="JSON file mapping source tables to glob patterns under --data-path (e.g. daily drops).",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["batch", "streaming", "incremental", "elt"],
+        default="batch",
+        help=(
+            "'batch' loads every table into memory; 'streaming' processes sales and payments in chunks; "
+            "'incremental' upserts only rows past the stored watermarks; "
+            "'elt' loads the cleaned raw tables and builds the marts in PostgreSQL."
+        ),
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=SALES_CHUNK_SIZE,
+        help="Rows per sales and payments chunk, and sales rows per partition, in streaming mode.",
+    )
+    parser.add_argument("--db-url", default=DEFAULT_DB_URL, help="SQLAlchemy URL of the target database.")
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=3,
+        help="Size of the connection pool shared by the concurrent table loads.",
+    )
+    parser.add_argument(
+        "--csv-engine",
+        choices=["c", "pyarrow"],
+        default="c",
+        help="CSV parser for fully-read tables; 'pyarrow' is multithreaded and needs pyarrow.",
+    )
+    parser.add_argument(
+        "--staging-dir",
+        default=DEFAULT_STAGING_DIR,
+        help="Directory of the typed Parquet cache used to skip re-parsing unchanged CSVs.",
+    )
+    parser.add_argument(
+        "--no-staging-cache",
+        dest="staging_dir",
+        action="store_const",
+        const=None,
+        help="Always parse the CSVs instead of using the Parquet staging cache.",
+    )
+    parser.add_argument(
+        "--state-dir",
+        default=DEFAULT_STATE_DIR,
+        help="Directory holding the incremental watermarks.",
+    )
+    parser.add_argument(
+        "--churn-window-days",
+        type=int,
+        default=CHURN_WINDOW_DAYS,
+        help="Days without an order, relative to the latest order, before a customer counts as churned.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to clean and transform in batch mode; above 1 the fact tables are hash-partitioned.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(TRANSFORM_BACKENDS),
+        default="pandas",
+        help="DataFrame engine of the batch and incremental transform; 'polars' is lazy and multithreaded.",
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        default=DEFAULT_METRICS_DIR,
+        help="Directory the per-run stage metrics JSON file is written to.",
+    )
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        help=(
+            "Name of this run in the metrics (default: timestamp) and in the checkpoints "
+            "(default: derived from the source files and options)."
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help=(
+            "Checkpoint the stages and loads of batch and streaming runs under this directory, so "
+            "rerunning a failed run resumes it; removed once the run succeeds. Off by default."
+        ),
+    )
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    # Stage metrics are logged as one JSON object per line
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    with RunMetrics(run_id=args.run_id, metrics_dir=args.metrics_dir) as metrics:
+        # Incremental runs resume through their watermarks; ELT loads are one step each
+        checkpoint = None
+        if args.checkpoint_dir is not None and args.mode in ("batch", "streaming"):
+            run_id = args.run_id or input_run_id(
+                args.mode,
+                resolve_sources(args.data_path, load_manifest(args.source_manifest)),
+                db_url=args.db_url,
+                chunksize=args.chunksize if args.mode == "streaming" else None,
+                churn_window_days=args.churn_window_days,
+                workers=args.workers,
+                backend=args.backend,
+            )
+            checkpoint = RunCheckpoint.for_run(run_id, args.checkpoint_dir)
+            print(f"[Checkpoint] Run state in {checkpoint.run_dir}")
+
+        if args.mode == "streaming":
+            run_streaming_etl(
+                args.data_path, args.chunksize, args.db_url, args.max_connections, args.csv_engine, args.staging_dir,
+                args.churn_window_days, source_manifest=args.source_manifest, checkpoint=checkpoint,
+            )
+        elif args.mode == "incremental":
+            run_incremental_etl(
+                args.data_path, args.db_url, args.max_connections, args.csv_engine, args.staging_dir, args.state_dir,
+                args.churn_window_days, args.backend, source_manifest=args.source_manifest,
+            )
+        elif args.mode == "elt":
+            run_elt(
+                args.data_path, args.db_url, args.max_connections, args.csv_engine, args.staging_dir,
+                source_manifest=args.source_manifest,
+            )
+        else:
+            run_batch_etl(
+                args.data_path, args.db_url, args.max_connections, args.csv_engine, args.staging_dir,
+                args.churn_window_days, args.workers, args.backend, source_manifest=args.source_manifest,
+                checkpoint=checkpoint,
+            )
+
+        # Finished: nothing left to resume
+        if checkpoint is not None:
+            checkpoint.discard()
 
-    print("ETL process complete.")
+    print(f"ETL process complete. Metrics for run {metrics.run_id} written to {args.metrics_dir}")
@@ -0,0 +1,183 @@
+# scripts/schemas.py
+
+import contextlib
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    # Arrow-backed strings store IDs contiguously instead of one Python object per cell
+    STRING_DTYPE = "string[pyarrow]"
+    HAS_PYARROW = True
+except ImportError:
+    STRING_DTYPE = "object"
+    HAS_PYARROW = False
+
+# ---------------------
+# Source Table Schemas
+# ---------------------
+# For every source CSV: its file name, the dtype of each column, which low-cardinality
+# columns are read as categoricals and which columns are parsed as dates at read time.
+
+TABLE_SCHEMAS = {
+    "customers": {
+        "file": "customers.csv",
+        "dtype": {
+            "customer_id": STRING_DTYPE,
+            "name": STRING_DTYPE,
+            "email": STRING_DTYPE,
+            "phone_number": STRING_DTYPE,
+        },
+        "categorical": ["gender", "location", "churn_status"],
+        "parse_dates": ["signup_date", "last_active_date"],
+    },
+    "sales_transactions": {
+        "file": "sales_transactions.csv",
+        "dtype": {
+            "order_id": STRING_DTYPE,
+            "customer_id": STRING_DTYPE,
+            "product_id": STRING_DTYPE,
+            "total_amount": "float64",
+            "payment_id": STRING_DTYPE,
+        },
+        "categorical": [],
+        "parse_dates": ["order_date"],
+    },
+    "products": {
+        "file": "products.csv",
+        "dtype": {
+            "product_id": STRING_DTYPE,
+            "price": "float64",
+            "stock_quantity": "float64",
+            "rating": "float64",
+            "reviews_count": "float64",
+        },
+        "categorical": ["name", "category", "supplier"],
+        "parse_dates": [],
+    },
+    "payments": {
+        "file": "payments.csv",
+        "dtype": {
+            "payment_id": STRING_DTYPE,
+            "order_id": STRING_DTYPE,
+            "user_id": STRING_DTYPE,
+            "total_paid": "float64",
+            "transaction_fee": "float64",
+        },
+        "categorical": ["payment_method", "payment_status"],
+        "parse_dates": ["payment_date"],
+    },
+    "marketing_ads": {
+        "file": "marketing_ads.csv",
+        "dtype": {
+            "campaign_name": STRING_DTYPE,
+            "clicks": "float64",
+            "conversions": "float64",
+            "cost_per_click": "float64",
+            "return_on_ad_spend": "float64",
+        },
+        "categorical": ["ad_source"],
+        "parse_dates": [],
+    },
+    "customer_support": {
+        "file": "customer_support.csv",
+        "dtype": {
+            "ticket_id": STRING_DTYPE,
+            "customer_id": STRING_DTYPE,
+            "feedback_rating": "float64",
+        },
+        "categorical": ["issue_type", "response_time", "resolution_status"],
+        "parse_dates": [],
+    },
+}
+
+def read_options(table_name, usecols=None):
+    """Keyword arguments for pd.read_csv that apply the table's schema.
+
+    Columns outside `usecols` are left out so the options stay valid for partial reads.
+    """
+    schema = TABLE_SCHEMAS[table_name]
+    keep = (lambda col: True) if usecols is None else (lambda col: col in usecols)
+
+    dtype = {col: dt for col, dt in schema["dtype"].items() if keep(col)}
+    dtype.update({col: "category" for col in schema["categorical"] if keep(col)})
+    options = {
+        "dtype": dtype,
+        "parse_dates": [col for col in schema["parse_dates"] if keep(col)],
+    }
+    if usecols is not None:
+        options["usecols"] = usecols
+    return options
+
+def arrow_to_pandas(table):
+    """Convert an Arrow table to pandas, keeping strings Arrow-backed (string[pyarrow])."""
+    string_dtype = pd.StringDtype("pyarrow")
+    mapping = {pa.string(): string_dtype, pa.large_string(): string_dtype}
+    return table.to_pandas(types_mapper=mapping.get)
+
+def _read_with_pyarrow(path, table_name, usecols=None):
+    # pyarrow's own multithreaded reader, converting straight to the registered types;
+    # going through pd.read_csv(engine="pyarrow") would re-convert every column in pandas
+    schema = TABLE_SCHEMAS[table_name]
+    column_types = {
+        col: pa.float64() if dt == "float64" else pa.string()
+        for col, dt in schema["dtype"].items()
+    }
+    column_types.update({col: pa.dictionary(pa.int32(), pa.string()) for col in schema["categorical"]})
+    column_types.update({col: pa.timestamp("ns") for col in schema["parse_dates"]})
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        strings_can_be_null=True,
+        include_columns=usecols,
+    )
+    return arrow_to_pandas(pa_csv.read_csv(path, convert_options=convert_options))
+
+@contextlib.contextmanager
+def open_source(path):
+    """`path` as pd.read_csv should be given it: zstd files as a decompressing Arrow stream.
+
+    pandas infers gzip from the extension itself, but needs the zstandard package for
+    .zst, which Arrow decompresses natively.
+    """
+    if not (path.endswith(".zst") and HAS_PYARROW):
+        yield path
+        return
+    with pa.input_stream(path, compression="zstd") as stream:
+        yield stream
+
+def concat_frames(frames):
+    """Concatenate frames read or cleaned separately, keeping categorical columns categorical.
+
+    Frames with different categories for a column would make pd.concat fall back to
+    object; their union is taken instead, in order of first appearance.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    for col in frames[0].columns:
+        dtypes = [frame[col].dtype for frame in frames]
+        if isinstance(dtypes[0], pd.CategoricalDtype) and any(dtype != dtypes[0] for dtype in dtypes):
+            categories = union_categoricals([frame[col] for frame in frames]).categories
+            frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def read_table(path, table_name, engine="c", usecols=None, **kwargs):
+    """Read one source CSV with its registered dtypes, categoricals and date columns.
+
+    `engine="pyarrow"` uses pyarrow's multithreaded CSV reader (requires pyarrow, ignores
+    extra read_csv keyword arguments and raises on malformed dates instead of coercing).
+    """
+    if engine == "pyarrow":
+        if not HAS_PYARROW:
+            raise ImportError("engine='pyarrow' requires the pyarrow package")
+        return _read_with_pyarrow(path, table_name, usecols)
+
+    options = read_options(table_name, usecols)
+    with open_source(path) as source:
+        df = pd.read_csv(source, engine=engine, **options, **kwargs)
+    # Date columns that could not be parsed come back as objects; coerce them to NaT
+    for col in options["parse_dates"]:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
@@ -0,0 +1,60 @@
+# scripts/source_manifest.py
+
+import glob
+import json
+import os
+
+from scripts.pipeline_layout import PROJECT_DIR
+from scripts.schemas import TABLE_SCHEMAS
+
+# The repo's data/ directory, wherever the ETL is started from
+DEFAULT_DATA_PATH = os.path.join(PROJECT_DIR, "data")
+
+# Compressed sources are read as they are: gzip by pandas, zstd through Arrow
+COMPRESSION_SUFFIXES = ["", ".gz", ".zst"]
+
+def default_patterns(table_name):
+    """The table's own CSV and its daily drops (<name>_*.csv), plain or compressed."""
+    stem, ext = os.path.splitext(TABLE_SCHEMAS[table_name]["file"])
+    return [f"{name}{ext}{suffix}" for name in (stem, f"{stem}_*") for suffix in COMPRESSION_SUFFIXES]
+
+def load_manifest(path=None):
+    """Glob patterns per source table: the defaults, overridden by the JSON file at `path`.
+
+    The file maps table names to one pattern or a list of patterns, relative to the
+    data path, e.g. {"sales_transactions": ["drops/sales_transactions_2026-10-*.csv.gz"]}.
+    """
+    manifest = {table_name: default_patterns(table_name) for table_name in TABLE_SCHEMAS}
+    if path is None:
+        return manifest
+
+    with open(path) as f:
+        overrides = json.load(f)
+    unknown = set(overrides) - set(TABLE_SCHEMAS)
+    if unknown:
+        raise ValueError(f"Unknown tables in source manifest {path}: {', '.join(sorted(unknown))}")
+    manifest.update({
+        table_name: [patterns] if isinstance(patterns, str) else list(patterns)
+        for table_name, patterns in overrides.items()
+    })
+    return manifest
+
+def resolve_sources(data_path, manifest, table_names=None):
+    """The files of each table in `table_names` (default: all), matched by its manifest patterns.
+
+    Files are sorted by name, so daily drops are read oldest first and deduplication
+    keeps a row's earliest delivery. A table without any matching file is an error.
+    """
+    sources = {}
+    for table_name in table_names or manifest:
+        paths = {
+            path
+            for pattern in manifest[table_name]
+            for path in glob.glob(os.path.join(data_path, pattern))
+            if os.path.isfile(path)
+        }
+        if not paths:
+            patterns = ", ".join(manifest[table_name])
+            raise FileNotFoundError(f"No source files for {table_name} in {data_path} (patterns: {patterns})")
+        sources[table_name] = sorted(paths)
+    return sources
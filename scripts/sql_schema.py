@@ -0,0 +1,102 @@
+# scripts/sql_schema.py
+
+import os
+import re
+
+SQL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "sql2"))
+CREATE_TABLES_SQL = os.path.join(SQL_DIR, "create_tables.sql")
+CREATE_MARTS_SQL = os.path.join(SQL_DIR, "create_marts.sql")
+
+_CREATE_TABLE = re.compile(
+    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s*\((.*?)\)"
+    r"\s*(?:PARTITION\s+BY\s+(\w+)\s*\((\w+)\))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_ALTER_TABLE = re.compile(r"ALTER\s+TABLE\s+(?:ONLY\s+)?(\w+)\s", re.IGNORECASE)
+_CREATE_MATVIEW = re.compile(
+    r"CREATE\s+MATERIALIZED\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE,
+)
+_TABLE_KEY = re.compile(
+    r"^(?:CONSTRAINT\s+\w+\s+)?(PRIMARY\s+KEY|UNIQUE(?:\s+NULLS\s+(?:NOT\s+)?DISTINCT)?)\s*\(([^)]*)\)",
+    re.IGNORECASE,
+)
+
+def split_statements(sql):
+    """Split a SQL script into statements, dropping `--` comments."""
+    sql = re.sub(r"--[^\n]*", "", sql)
+    return [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+
+def _split_top_level(body):
+    # Split a CREATE TABLE body on commas that are not inside parentheses
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+def parse_tables(path=CREATE_TABLES_SQL):
+    """Table definitions from a CREATE TABLE script.
+
+    Returns {table: {"columns": [...], "key": [...], "partition_by": ..., "ddl": statement,
+    "alter": [statements]}}. The key is the primary key if there is one, otherwise the
+    first UNIQUE constraint, otherwise []. "partition_by" is (strategy, column) for a
+    partitioned table, else None. "alter" holds the script's ALTER TABLE statements for
+    the table, in order; "columns" and "key" do not reflect them.
+    """
+    with open(path) as f:
+        statements = split_statements(f.read())
+
+    tables = {}
+    alters = {}
+    for stmt in statements:
+        alter = _ALTER_TABLE.match(stmt)
+        if alter:
+            alters.setdefault(alter.group(1).lower(), []).append(stmt)
+        match = _CREATE_TABLE.match(stmt)
+        if not match:
+            continue
+        table_name, body = match.group(1).lower(), match.group(2)
+        columns, primary_key, unique_keys = [], [], []
+        for part in _split_top_level(body):
+            key_match = _TABLE_KEY.match(part)
+            if key_match:
+                key = [col.strip().lower() for col in key_match.group(2).split(",")]
+                if key_match.group(1).upper().startswith("PRIMARY"):
+                    primary_key = key
+                else:
+                    unique_keys.append(key)
+                continue
+            column = part.split()[0].lower()
+            columns.append(column)
+            if re.search(r"\bPRIMARY\s+KEY\b", part, re.IGNORECASE):
+                primary_key = [column]
+            elif re.search(r"\bUNIQUE\b", part, re.IGNORECASE):
+                unique_keys.append([column])
+        tables[table_name] = {
+            "columns": columns,
+            "key": primary_key or (unique_keys[0] if unique_keys else []),
+            "partition_by": (match.group(3).upper(), match.group(4).lower()) if match.group(3) else None,
+            "ddl": stmt,
+        }
+    for table_name, table in tables.items():
+        table["alter"] = alters.get(table_name, [])
+    return tables
+
+def table_key(table_name, path=CREATE_TABLES_SQL):
+    """The upsert key declared for `table_name` in create_tables.sql."""
+    return parse_tables(path)[table_name]["key"]
+
+def materialized_view_names(path=CREATE_MARTS_SQL):
+    """Names of the materialized views a SQL script creates, in script order."""
+    with open(path) as f:
+        statements = split_statements(f.read())
+    return [m.group(1).lower() for m in map(_CREATE_MATVIEW.match, statements) if m]
@@ -0,0 +1,156 @@
+# scripts/staging_cache.py
+
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from scripts.pipeline_layout import PROJECT_DIR
+from scripts.schemas import TABLE_SCHEMAS, arrow_to_pandas, read_table
+
+DEFAULT_STAGING_DIR = os.path.join(PROJECT_DIR, ".staging")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_LOCK_FILE = "manifest.lock"
+
+def content_hash(path, block_size=1 << 20):
+    """blake2b digest of a file's bytes, read in `block_size` blocks."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def schema_fingerprint(table_name, engine):
+    """Digest of what a staged copy's parse depended on besides the file: the table's
+    TABLE_SCHEMAS entry, the CSV engine and the pandas and pyarrow versions."""
+    parse = {
+        "schema": TABLE_SCHEMAS[table_name],
+        "engine": engine,
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__ if HAS_PYARROW else None,
+    }
+    encoded = json.dumps(parse, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+class StagingCache:
+    """Typed Parquet copies of the source CSVs, re-parsed only when a source changes.
+
+    Each cached table is keyed by its source file's path, size, mtime and content
+    hash, and by the schema fingerprint it was parsed with. An unchanged size and
+    mtime is trusted without hashing; if either moved, the file is hashed and only
+    re-parsed when the content really differs.
+    """
+
+    def __init__(self, staging_dir=DEFAULT_STAGING_DIR):
+        if not HAS_PYARROW:
+            raise ImportError("The staging cache needs the pyarrow package (pip install pyarrow)")
+        self.staging_dir = staging_dir
+        self.manifest_path = os.path.join(staging_dir, MANIFEST_FILE)
+        os.makedirs(staging_dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {}
+        # Files of one extract are staged from several threads
+        self._lock = threading.Lock()
+
+    def _save_manifest(self, key, entry):
+        # Several extract tasks may share one staging dir: write back only our entry on
+        # top of what they saved since we loaded it, under a lock file they take too
+        lock_path = os.path.join(self.staging_dir, MANIFEST_LOCK_FILE)
+        with self._lock, open(lock_path, "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path) as f:
+                    self.manifest = json.load(f)
+            self.manifest[key] = entry
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+
+    def parquet_path(self, key):
+        return os.path.join(self.staging_dir, f"{key}.parquet")
+
+    def is_fresh(self, path, key, fingerprint):
+        """True if the cached Parquet under `key` still matches the CSV at `path`, parsed
+        as `fingerprint` (see schema_fingerprint) describes."""
+        entry = self.manifest.get(key)
+        if entry is None or entry["source"] != os.path.abspath(path):
+            return False
+        if entry.get("fingerprint") != fingerprint:
+            return False
+        if not os.path.exists(self.parquet_path(key)):
+            return False
+
+        stat = os.stat(path)
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        if entry["size"] != stat.st_size or content_hash(path) != entry["hash"]:
+            return False
+        # Touched but identical content: remember the new mtime so the next check is free
+        self._save_manifest(key, {**entry, "mtime_ns": stat.st_mtime_ns})
+        return True
+
+    def read(self, path, table_name, engine="c", key=None):
+        """Return `table_name` from the Parquet cache, parsing `path` only if it changed.
+
+        Each source file is cached under its own `key`, the table name by default; a
+        table read from several files needs one key per file.
+        """
+        key = key or table_name
+        parquet_path = self.parquet_path(key)
+        fingerprint = schema_fingerprint(table_name, engine)
+        if self.is_fresh(path, key, fingerprint):
+            print(f"[Extract] {table_name}: unchanged, reading staged {parquet_path}")
+            return arrow_to_pandas(pq.read_table(parquet_path, memory_map=True))
+
+        print(f"[Extract] {table_name}: parsing {path} and staging it")
+        stat = os.stat(path)
+        df = read_table(path, table_name, engine=engine)
+        tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+
+        self._save_manifest(key, {
+            "source": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": content_hash(path),
+            "fingerprint": fingerprint,
+        })
+        return df
+
+    def read_matching(self, path, table_name, column, values, engine="c", key=None):
+        """The rows of `table_name` at `path` whose `column` is one of `values`.
+
+        An unchanged file is filtered while its Parquet copy is scanned; a changed one
+        is parsed and staged first, like read().
+        """
+        key = key or table_name
+        parquet_path = self.parquet_path(key)
+        if not self.is_fresh(path, key, schema_fingerprint(table_name, engine)):
+            df = self.read(path, table_name, engine=engine, key=key)
+            return df[df[column].isin(values)]
+
+        print(f"[Extract] {table_name}: unchanged, reading matching {column} rows of staged {parquet_path}")
+        value_type = pq.read_schema(parquet_path).field(column).type
+        matching = pc.field(column).isin(pa.array(list(values), type=value_type))
+        return arrow_to_pandas(pq.read_table(parquet_path, memory_map=True, filters=matching))
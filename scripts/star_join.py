@@ -0,0 +1,106 @@
+# scripts/star_join.py
+
+import numpy as np
+import pandas as pd
+
+from scripts.metrics import track
+
+def encode_keys(fact_keys, dimension_keys):
+    """Integer codes for a join key, shared by both sides.
+
+    Both key columns are factorized together in one pass (Arrow's dictionary encoding
+    for Arrow-backed strings), so equal keys get equal codes without a second hash
+    lookup. Returns (fact_codes, dimension_codes, num_codes); missing keys get -1.
+    """
+    keys = pd.concat([pd.Series(fact_keys), pd.Series(dimension_keys)], ignore_index=True)
+    codes, uniques = pd.factorize(keys)
+    return codes[:len(fact_keys)], codes[len(fact_keys):], len(uniques)
+
+def left_join_indexer(fact_codes, dimension_codes, num_keys):
+    """Row positions of a left join of the fact rows to the dimension rows.
+
+    Codes run from 0 to num_keys - 1; -1 (a missing key) never matches. Returns
+    (fact_take, dimension_take): output row i is fact row fact_take[i] next to
+    dimension row dimension_take[i] (-1 when it has no match). As with
+    DataFrame.merge(how="left"), fact rows keep their order and a fact row matching
+    several dimension rows is repeated once per match, in the dimension's row order.
+    """
+    valid = dimension_codes >= 0
+    counts = np.bincount(dimension_codes[valid], minlength=num_keys)
+    matched = fact_codes >= 0
+    matched[matched] = counts[fact_codes[matched]] > 0
+
+    if counts.max(initial=0) <= 1:
+        # Unique dimension keys: a plain lookup, the fact rows are not repeated
+        position_of_code = np.full(num_keys, -1, dtype=np.intp)
+        position_of_code[dimension_codes[valid]] = np.flatnonzero(valid)
+        dimension_take = np.where(matched, position_of_code[fact_codes], -1)
+        return np.arange(len(fact_codes)), dimension_take
+
+    # Dimension rows grouped by code, in original order within each code
+    order = np.argsort(np.where(valid, dimension_codes, num_keys), kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    matches = np.where(matched, counts[fact_codes], 0)
+    repeats = np.maximum(matches, 1)
+
+    fact_take = np.repeat(np.arange(len(fact_codes)), repeats)
+    offsets = np.arange(len(fact_take)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    first = np.repeat(np.where(matched, starts[np.maximum(fact_codes, 0)], 0), repeats)
+    dimension_take = np.where(np.repeat(matches, repeats) > 0, order[first + offsets], -1)
+    return fact_take, dimension_take
+
+def take(series, positions):
+    """`series` values at `positions`, with -1 giving a missing value (like a left merge)."""
+    # Plain NumPy columns are taken as ndarrays: taking their NumpyExtensionArray
+    # wrapper is deprecated. Extension arrays (categorical, Int64, ...) take themselves.
+    values = series.to_numpy() if isinstance(series.dtype, np.dtype) else series.array
+    return pd.api.extensions.take(values, positions, allow_fill=True)
+
+def star_join(fact, dimensions, columns=None):
+    """Left-join `fact` to several dimension tables in one gather.
+
+    `dimensions` is a list of (name, frame, key) where `key` is a column of both `fact`
+    and `frame`. Each key is hashed once into integer codes and every join is resolved
+    to row positions first; each output column is then gathered from its source table
+    exactly once, with no intermediate wide frames. Output column names follow chained
+    DataFrame.merge calls ("_x"/"_y" suffixes on clashes).
+
+    `columns` projects the output: a list of output column names, or a dict mapping new
+    names to output column names.
+    """
+    positions = {"fact": np.arange(len(fact))}
+    sources = {col: ("fact", col) for col in fact.columns}
+    frames = {"fact": fact}
+
+    for name, frame, key in dimensions:
+        with track(f"join_{name}", rows_in=len(positions["fact"])) as record:
+            fact_codes, dimension_codes, num_codes = encode_keys(fact[key], frame[key])
+            fact_take, dimension_take = left_join_indexer(
+                fact_codes[positions["fact"]], dimension_codes, num_codes
+            )
+            positions = {table: taken[fact_take] for table, taken in positions.items()}
+            positions[name] = dimension_take
+            frames[name] = frame
+            record["rows_out"] = len(fact_take)
+
+        # Name the new columns the way DataFrame.merge(suffixes=("_x", "_y")) would
+        clashes = (set(sources) & set(frame.columns)) - {key}
+        sources = {(f"{col}_x" if col in clashes else col): source for col, source in sources.items()}
+        sources.update({
+            (f"{col}_y" if col in clashes else col): (name, col)
+            for col in frame.columns if col != key
+        })
+
+    if columns is None:
+        columns = {col: col for col in sources}
+    elif not isinstance(columns, dict):
+        columns = {col: col for col in columns}
+
+    with track("gather_star_join", rows_in=len(positions["fact"])) as record:
+        data = {}
+        for output, col in columns.items():
+            table, source_col = sources[col]
+            data[output] = take(frames[table][source_col], positions[table])
+        result = pd.DataFrame(data, index=pd.RangeIndex(len(positions["fact"])), copy=False)
+        record["rows_out"] = len(result)
+    return result
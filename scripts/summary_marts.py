@@ -0,0 +1,117 @@
+# scripts/summary_marts.py
+#
+# Pre-aggregated marts for the dashboard, built from the row-level marts while they are
+# still in memory:
+#
+#   sales_daily_by_category        <- sales_mart      (day x category)
+#   sales_daily_by_location        <- sales_mart      (day x location)
+#   sales_daily_by_payment_method  <- sales_mart      (day x payment_method)
+#   campaign_summary               <- marketing_mart  (ad_source)
+#   support_summary                <- support_mart    (issue_type x resolution_status)
+#
+# The sales rollups stay at one dimension per day, so they are a small fraction of
+# sales_mart. Every sales measure is a count or a sum, so rollups of disjoint sets of
+# orders (streamed chunks) combine by adding them up, and one day can be re-aggregated
+# on its own when an incremental run touches it.
+
+import pandas as pd
+
+from scripts.load_to_postgres import is_arrow_table, quote_ident
+from scripts.pipeline_layout import SALES_ROLLUPS
+from scripts.schemas import arrow_to_pandas
+
+SALES_MEASURES = ["orders", "sales_amount", "payments", "amount_paid"]
+SALES_SUMMARY_SOURCE_COLUMNS = [
+    "order_id", "order_date", *SALES_ROLLUPS.values(), "total_amount", "total_paid",
+]
+
+def _columns(mart, columns):
+    # Only the aggregated columns, also out of an Arrow table from the polars backend
+    if is_arrow_table(mart):
+        return arrow_to_pandas(mart.select(columns))
+    return mart[columns]
+
+def build_sales_rollup(sales_mart, dimension):
+    """Orders, sales amount, payments and amount paid per day and `dimension` value.
+
+    sales_mart has one row per sale and payment, so orders and their total_amount are
+    counted once per group; an order paid with several methods counts under each method.
+    """
+    df = _columns(sales_mart, ["order_id", "order_date", dimension, "total_amount", "total_paid"])
+    df = df.assign(order_date=df["order_date"].dt.normalize())
+    keys = ["order_date", dimension]
+    by = dict(observed=True, dropna=False)
+    orders = (
+        df.drop_duplicates(keys + ["order_id"])
+        .groupby(keys, **by)
+        .agg(orders=("order_id", "size"), sales_amount=("total_amount", "sum"))
+    )
+    payments = df.groupby(keys, **by).agg(payments=("total_paid", "count"), amount_paid=("total_paid", "sum"))
+    return orders.join(payments).reset_index()
+
+def build_sales_rollups(sales_mart):
+    """Every SALES_ROLLUPS table, by name."""
+    return {name: build_sales_rollup(sales_mart, dimension) for name, dimension in SALES_ROLLUPS.items()}
+
+def combine_sales_rollups(rollups):
+    """One rollup out of rollups (of the same table) of disjoint sets of orders."""
+    combined = pd.concat(rollups, ignore_index=True)
+    keys = [col for col in combined.columns if col not in SALES_MEASURES]
+    return combined.groupby(keys, observed=True, dropna=False)[SALES_MEASURES].sum().reset_index()
+
+def build_campaign_summary(marketing_mart):
+    """Ads, clicks, conversions and cost per ad_source, with the cost of one conversion."""
+    df = _columns(marketing_mart, ["ad_source", "campaign_name", "clicks", "conversions", "cost"])
+    summary = (
+        df.groupby("ad_source", observed=True, dropna=False)
+        .agg(
+            campaigns=("campaign_name", "nunique"),
+            ads=("campaign_name", "size"),
+            clicks=("clicks", "sum"),
+            conversions=("conversions", "sum"),
+            cost=("cost", "sum"),
+        )
+        .reset_index()
+    )
+    summary["cost_per_conversion"] = summary["cost"] / summary["conversions"].where(summary["conversions"] > 0)
+    return summary
+
+def build_support_summary(support_mart):
+    """Ticket count and average feedback_rating per issue_type and resolution_status."""
+    df = _columns(support_mart, ["issue_type", "resolution_status", "ticket_id", "feedback_rating"])
+    return (
+        df.groupby(["issue_type", "resolution_status"], observed=True, dropna=False)
+        .agg(tickets=("ticket_id", "size"), avg_feedback_rating=("feedback_rating", "mean"))
+        .reset_index()
+    )
+
+def build_summary_marts(sales_mart, marketing_mart, support_mart):
+    """All summary marts, by table name."""
+    print("📈 Building summary marts...")
+    return {
+        **build_sales_rollups(sales_mart),
+        "campaign_summary": build_campaign_summary(marketing_mart),
+        "support_summary": build_support_summary(support_mart),
+    }
+
+def sales_days(sales_mart):
+    """The distinct order days of a (partial) sales_mart, as dates."""
+    order_dates = _columns(sales_mart, ["order_date"])["order_date"]
+    return sorted(order_dates.dt.normalize().dropna().dt.date.unique())
+
+def read_sales_days(engine, days):
+    """The summary columns of every loaded sales_mart row on one of `days`.
+
+    An incremental run only holds its own rows of a day; re-aggregating the day from
+    the loaded table counts the rows of earlier runs too.
+    """
+    columns = ", ".join(quote_ident(col) for col in SALES_SUMMARY_SOURCE_COLUMNS)
+    return pd.read_sql(
+        f"SELECT {columns} FROM sales_mart WHERE order_date::date = ANY(%(days)s)",
+        engine,
+        params={"days": list(days)},
+        parse_dates=["order_date"],
+    )
+
+def read_support_mart(engine):
+    return pd.read_sql("SELECT issue_type, resolution_status, ticket_id, feedback_rating FROM support_mart", engine)
@@ -2,117 +2,118 @@
 
 import pandas as pd
 
+from scripts.cleaning import CLEANING_SPECS, apply_cleaning_spec
+from scripts.customer_activity import churned_customers, last_order_dates, lookup_flags
+from scripts.dedup import deduplicate
+from scripts.metrics import instrumented
+from scripts.star_join import star_join
+
 # ---------------------
 # Cleaning Functions
 # ---------------------
 
-def clean_customers_sup(df, table_name):
+def clean_table(df, table_name, spec_table):
+    """Apply `spec_table`'s cleaning spec to `df` if `table_name` names that table."""
     if df is None:
         return None
 
     print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "customer_support":
-        df.dropna(subset=["ticket_id"], inplace=True)
-        df.dropna(subset=["customer_id"], inplace=True)
-        df["issue_type"].fillna("Unknown", inplace=True)
-        df["response_time"].fillna("Unknown", inplace=True)
-        df["resolution_status"].fillna("Pending", inplace=True)
-        median_rating = df["feedback_rating"].median()
-        df["feedback_rating"].fillna(median_rating, inplace=True)
+    if table_name == spec_table:
+        df = apply_cleaning_spec(df, CLEANING_SPECS[spec_table])
     print(f"✅ Cleaned: {table_name}")
     return df
 
-def clean_customer(df, table_name):
-    if df is None:
-        return None
+@instrumented
+def clean_customers_sup(df, table_name):
+    return clean_table(df, table_name, "customer_support")
 
-    print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "customers":
-        df.dropna(subset=["signup_date"], inplace=True)
-        df["name"].fillna("Unknown", inplace=True)
-        df["email"].fillna("Unknown", inplace=True)
-        df["phone_number"].fillna("000-000000", inplace=True)
-        df["last_active_date"].fillna(df["signup_date"], inplace=True)
-        df["location"].fillna("Unknown", inplace=True)
-        df["churn_status"].fillna("Active", inplace=True)
-        df["signup_date"] = pd.to_datetime(df["signup_date"], errors="coerce")
-        df["last_active_date"] = pd.to_datetime(df["last_active_date"], errors="coerce")
-    print(f"✅ Cleaned: {table_name}")
-    return df
+@instrumented
+def clean_customer(df, table_name):
+    return clean_table(df, table_name, "customers")
 
+@instrumented
 def clean_marketing_ads(df, table_name):
-    if df is None:
-        return None
-
-    print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "marketing_ads":
-        df["ad_source"].fillna("Unknown", inplace=True)
-        df["campaign_name"].fillna("Unnamed Campaign", inplace=True)
-        df["clicks"].fillna(0, inplace=True)
-        df["conversions"].fillna(0, inplace=True)
-        mean_cpc = df["cost_per_click"].mean()
-        df["cost_per_click"].fillna(mean_cpc, inplace=True)
-        median_roas = df["return_on_ad_spend"].median()
-        df["return_on_ad_spend"].fillna(median_roas, inplace=True)
-    print(f"✅ Cleaned: {table_name}")
-    return df
+    return clean_table(df, table_name, "marketing_ads")
 
+@instrumented
 def clean_payments(df, table_name):
-    if df is None:
-        return None
-
-    print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "payments":
-        df.dropna(subset=["order_id"], inplace=True)
-        df.dropna(subset=["payment_date"], inplace=True)
-        df.dropna(subset=["total_paid"], inplace=True)
-        df["payment_method"].fillna("Unknown", inplace=True)
-        median_fee = df["transaction_fee"].median()
-        df["transaction_fee"].fillna(median_fee, inplace=True)
-        df["payment_status"].fillna("Pending", inplace=True)
-        df["payment_date"] = pd.to_datetime(df["payment_date"], errors="coerce")
-    print(f"✅ Cleaned: {table_name}")
-    return df
+    return clean_table(df, table_name, "payments")
 
+@instrumented
 def clean_products(df, table_name):
-    if df is None:
-        return None
-
-    print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "products":
-        df["name"].fillna("Unknown Product", inplace=True)
-        df["category"].fillna("Other", inplace=True)
-        median_price = df["price"].median()
-        df["price"].fillna(median_price, inplace=True)
-        df["stock_quantity"].fillna(0, inplace=True)
-        df["supplier"].fillna("Unknown Supplier", inplace=True)
-        mean_rating = df["rating"].mean()
-        df["rating"].fillna(mean_rating, inplace=True)
-        df["reviews_count"].fillna(0, inplace=True)
-    print(f"✅ Cleaned: {table_name}")
-    return df
+    return clean_table(df, table_name, "products")
 
+@instrumented
 def clean_sales_transaction(df, table_name):
-    if df is None:
-        return None
+    return clean_table(df, table_name, "sales_transactions")
 
-    print(f"🔹 Cleaning {table_name} data...")
-    if table_name == "sales_transactions":
-        df.dropna(subset=["customer_id"], inplace=True)
-        df.dropna(subset=["product_id"], inplace=True)
-        df.dropna(subset=["order_date"], inplace=True)
-        df.dropna(subset=["total_amount"], inplace=True)
-        df["payment_id"].fillna("Unknown", inplace=True)
-        df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
-    print(f"✅ Cleaned: {table_name}")
-    return df
+# ---------------------
+# Mart Builders
+# ---------------------
+
+# Columns a sales row must have to survive clean_sales_transaction
+SALES_REQUIRED_COLUMNS = CLEANING_SPECS["sales_transactions"]["required"]
+
+CHURN_WINDOW_DAYS = 30
+
+def build_sales_mart(sales, customers, products, payments, columns=None):
+    """Left-join sales to customers, products and payments and add revenue.
+
+    `columns` optionally projects the mart (see star_join); only the projected
+    columns are ever materialized.
+    """
+    # Merge sales with customers, products, and payments
+    dimensions = [
+        ("customers", customers, "customer_id"),
+        ("products", products, "product_id"),
+        ("payments", payments, "order_id"),
+    ]
+    if isinstance(columns, dict):
+        columns = {name: col for name, col in columns.items() if col != "revenue"}
+    elif columns is not None:
+        columns = [col for col in columns if col != "revenue"]
+    sales_mart = star_join(sales, dimensions, columns)
+
+    # Calculate revenue (assuming columns 'quantity' and 'price' exist)
+    if "quantity" in sales_mart.columns and "price" in sales_mart.columns:
+        sales_mart["revenue"] = sales_mart["quantity"] * sales_mart["price"]
+    else:
+        sales_mart["revenue"] = None
+    return sales_mart
+
+def flag_churned(sales_mart, customer_last_order, window_days=CHURN_WINDOW_DAYS):
+    # Customers whose last order is older than `window_days` before the most recent order,
+    # looked up per row by position in the per-customer table
+    churned = churned_customers(customer_last_order, window_days)
+    sales_mart["churned"] = lookup_flags(sales_mart["customer_id"], churned)
+    return sales_mart
+
+def build_marketing_mart(marketing_ads):
+    marketing_mart = marketing_ads.copy()
+    if "clicks" in marketing_mart.columns and "cost_per_click" in marketing_mart.columns:
+        marketing_mart["cost"] = marketing_mart["clicks"] * marketing_mart["cost_per_click"]
+    else:
+        marketing_mart["cost"] = None
+    return marketing_mart
+
+def build_support_mart(customer_support):
+    # For customer support data, simply copy cleaned data
+    return customer_support.copy()
 
 # ---------------------
 # Transformation Function
 # ---------------------
 
-def transform_all(customers, sales, products, payments, marketing_ads, customer_support):
-    print("🔄 Starting full transformation process...")
+def clean_all(customers, sales, products, payments, marketing_ads, customer_support):
+    """Deduplicate and clean every source table; returns them in the same order."""
+    # Drop duplicate rows first, so they neither skew the fill statistics nor
+    # multiply rows in the sales_mart joins
+    customers = deduplicate(customers, "customers")
+    sales = deduplicate(sales, "sales_transactions")
+    products = deduplicate(products, "products")
+    payments = deduplicate(payments, "payments")
+    marketing_ads = deduplicate(marketing_ads, "marketing_ads")
+    customer_support = deduplicate(customer_support, "customer_support")
 
     # Clean each dataset
     customers = clean_customer(customers, "customers")
@@ -121,44 +122,70 @@ def transform_all(customers, sales, products, payments, marketing_ads, customer_
     payments = clean_payments(payments, "payments")
     marketing_ads = clean_marketing_ads(marketing_ads, "marketing_ads")
     customer_support = clean_customers_sup(customer_support, "customer_support")
+    return customers, sales, products, payments, marketing_ads, customer_support
+
+def transform_all(
+    customers,
+    sales,
+    products,
+    payments,
+    marketing_ads,
+    customer_support,
+    customer_last_order=None,
+    churn_window_days=CHURN_WINDOW_DAYS,
+):
+    """Clean every table and build the three marts.
+
+    `customer_last_order` (last order date per customer) is derived from `sales` unless
+    given; pass it when `sales` is only a slice of the history, as in incremental runs.
+    """
+    print("🔄 Starting full transformation process...")
+
+    customers, sales, products, payments, marketing_ads, customer_support = clean_all(
+        customers, sales, products, payments, marketing_ads, customer_support
+    )
 
     # Create Sales Mart: Merge sales with customers, products, and payments
     print("🔁 Merging datasets for sales_mart...")
-    sales_mart = sales.merge(customers, on="customer_id", how="left")
-    sales_mart = sales_mart.merge(products, on="product_id", how="left")
-    sales_mart = sales_mart.merge(payments, on="order_id", how="left")
-    
-    # Calculate revenue (assuming columns 'quantity' and 'price' exist)
-    if "quantity" in sales_mart.columns and "price" in sales_mart.columns:
-        sales_mart["revenue"] = sales_mart["quantity"] * sales_mart["price"]
-    else:
-        sales_mart["revenue"] = None
+    sales_mart = build_sales_mart(sales, customers, products, payments)
 
     # Flag churned customers: customers with last order older than 30 days from the most recent order
     print("📆 Flagging churned customers...")
     if "order_date" in sales_mart.columns:
-        sales_mart["order_date"] = pd.to_datetime(sales_mart["order_date"], errors="coerce")
-        last_date = sales_mart["order_date"].max()
-        customer_last_order = sales_mart.groupby("customer_id")["order_date"].max()
-        churned_customers = customer_last_order[customer_last_order < (last_date - pd.Timedelta(days=30))].index
-        sales_mart["churned"] = sales_mart["customer_id"].isin(churned_customers)
+        if customer_last_order is None:
+            customer_last_order = last_order_dates(sales)
+        sales_mart = flag_churned(sales_mart, customer_last_order, churn_window_days)
     else:
         sales_mart["churned"] = False
 
     # Create Marketing Mart: Process marketing ads data (calculate cost)
     print("📊 Creating marketing_mart...")
-    marketing_mart = marketing_ads.copy()
-    if "clicks" in marketing_mart.columns and "cost_per_click" in marketing_mart.columns:
-        marketing_mart["cost"] = marketing_mart["clicks"] * marketing_mart["cost_per_click"]
-    else:
-        marketing_mart["cost"] = None
+    marketing_mart = build_marketing_mart(marketing_ads)
 
     # Create Support Mart: For customer support data, simply copy cleaned data
     print("💬 Creating support_mart...")
-    support_mart = customer_support.copy()
+    support_mart = build_support_mart(customer_support)
 
     print("✅ Transformation complete.")
     return sales_mart, marketing_mart, support_mart
 
+# ---------------------
+# Streaming Transformation
+# ---------------------
+
+def scan_last_order_dates(sales_chunks):
+    """First streaming pass: per-customer last order date over every cleaned sales chunk.
+
+    Only needs the SALES_REQUIRED_COLUMNS, so callers should read the chunks with
+    `usecols=SALES_REQUIRED_COLUMNS` to keep this pass cheap.
+    """
+    customer_last_order = None
+    for chunk in sales_chunks:
+        chunk = chunk.dropna(subset=SALES_REQUIRED_COLUMNS)
+        customer_last_order = last_order_dates(chunk, previous=customer_last_order)
+    if customer_last_order is None:
+        customer_last_order = pd.Series(dtype="datetime64[ns]")
+    return customer_last_order
+
 if __name__ == "__main__":
     print("This module provides the transform_all() function for ETL processing.")
\ No newline at end of file
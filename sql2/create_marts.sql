@@ -1,9 +1,33 @@
 -- sql/create_marts.sql
 
+-- In-database marts for the ELT mode of scripts/run_etl.py, built over the raw tables
+-- from create_tables.sql. They are materialized views named *_mv so they can live next
+-- to the sales_mart/marketing_mart/support_mart tables loaded by the pandas path.
+-- Each has a unique index so it can be refreshed with REFRESH MATERIALIZED VIEW
+-- CONCURRENTLY, which keeps it readable while it is rebuilt.
+
+-- Join key indexes
+CREATE INDEX IF NOT EXISTS sales_transactions_customer_id_idx ON sales_transactions (customer_id);
+CREATE INDEX IF NOT EXISTS sales_transactions_product_id_idx ON sales_transactions (product_id);
+CREATE INDEX IF NOT EXISTS payments_order_id_idx ON payments (order_id);
+
 -- Sales Mart: Combines sales, customers, products, and payments data
-CREATE OR REPLACE VIEW sales_mart AS
-SELECT 
-    s.transaction_id,
+-- churned mirrors scripts/transform_data.py: last order more than CHURN_WINDOW_DAYS
+-- before the latest order of any customer. scripts/elt.py fills in the placeholders:
+-- that window, and one churned_<n>d column per customer_activity.CHURN_WINDOWS entry.
+-- An existing view keeps its columns; drop it once to pick up changed windows.
+CREATE MATERIALIZED VIEW IF NOT EXISTS sales_mart_mv AS
+WITH last_orders AS (
+    SELECT customer_id, MAX(order_date) AS last_order_date
+    FROM sales_transactions
+    GROUP BY customer_id
+),
+idle AS (
+    SELECT customer_id, (SELECT MAX(last_order_date) FROM last_orders) - last_order_date AS idle_time
+    FROM last_orders
+)
+SELECT
+    s.order_id,
     s.customer_id,
     c.name AS customer_name,
     s.product_id,
@@ -13,17 +37,23 @@ SELECT
     p.price,
     s.quantity * p.price AS revenue,
     s.payment_id,
+    pm.payment_id AS payment_record_id,
     pm.payment_date,
     pm.payment_method,
-    c.churn_status
+    c.churn_status,
+    i.idle_time > INTERVAL '{churn_window_days} days' AS churned,
+    {churn_window_columns}
 FROM sales_transactions s
 LEFT JOIN customers c ON s.customer_id = c.customer_id
 LEFT JOIN products p ON s.product_id = p.product_id
-LEFT JOIN payments pm ON s.order_id = pm.order_id;
+LEFT JOIN payments pm ON s.order_id = pm.order_id
+LEFT JOIN idle i ON s.customer_id = i.customer_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS sales_mart_mv_key ON sales_mart_mv (order_id, payment_record_id);
 
 -- Marketing Mart: Summarizes marketing ads data
-CREATE OR REPLACE VIEW marketing_mart AS
-SELECT 
+CREATE MATERIALIZED VIEW IF NOT EXISTS marketing_mart_mv AS
+SELECT
     ad_id,
     ad_source,
     campaign_name,
@@ -34,9 +64,11 @@ SELECT
     clicks * cost_per_click AS cost
 FROM marketing_ads;
 
+CREATE UNIQUE INDEX IF NOT EXISTS marketing_mart_mv_key ON marketing_mart_mv (ad_id);
+
 -- Support Mart: Provides customer support details for analysis
-CREATE OR REPLACE VIEW support_mart AS
-SELECT 
+CREATE MATERIALIZED VIEW IF NOT EXISTS support_mart_mv AS
+SELECT
     ticket_id,
     customer_id,
     issue_type,
@@ -44,3 +76,5 @@ SELECT
     resolution_status,
     feedback_rating
 FROM customer_support;
+
+CREATE UNIQUE INDEX IF NOT EXISTS support_mart_mv_key ON support_mart_mv (ticket_id);
@@ -68,3 +68,168 @@ CREATE TABLE IF NOT EXISTS customer_support (
     resolution_status VARCHAR(50),
     feedback_rating NUMERIC
 );
+
+-- ---------------------
+-- Raw tables as the ELT mode of scripts/run_etl.py loads them
+-- ---------------------
+-- The sources' IDs are strings (e.g. C00001) and the cleaned data holds counts as
+-- floats, so the tables above are widened to match. The loader runs a table's ALTER
+-- TABLE statements right after creating it (an existing table is left as it is).
+
+ALTER TABLE customers
+    ALTER COLUMN customer_id DROP DEFAULT,
+    ALTER COLUMN customer_id TYPE VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS gender VARCHAR(50);
+
+-- The source has no transaction_id or quantity: the former keeps its SERIAL, the latter stays NULL
+ALTER TABLE sales_transactions
+    ALTER COLUMN customer_id TYPE VARCHAR(50),
+    ALTER COLUMN product_id TYPE VARCHAR(50),
+    ALTER COLUMN order_id TYPE VARCHAR(50);
+
+ALTER TABLE products
+    ALTER COLUMN product_id DROP DEFAULT,
+    ALTER COLUMN product_id TYPE VARCHAR(50),
+    ALTER COLUMN stock_quantity TYPE NUMERIC,
+    ALTER COLUMN reviews_count TYPE NUMERIC;
+
+ALTER TABLE payments
+    ALTER COLUMN payment_id DROP DEFAULT,
+    ALTER COLUMN payment_id TYPE VARCHAR(50),
+    ALTER COLUMN order_id TYPE VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS user_id VARCHAR(50);
+
+ALTER TABLE marketing_ads
+    ALTER COLUMN clicks TYPE NUMERIC,
+    ALTER COLUMN conversions TYPE NUMERIC;
+
+ALTER TABLE customer_support
+    ALTER COLUMN ticket_id DROP DEFAULT,
+    ALTER COLUMN ticket_id TYPE VARCHAR(50),
+    ALTER COLUMN customer_id TYPE VARCHAR(50);
+
+-- ---------------------
+-- Mart Tables (loaded by scripts/run_etl.py)
+-- ---------------------
+-- Keys below are the upsert targets for incremental runs (INSERT ... ON CONFLICT).
+-- UNIQUE NULLS NOT DISTINCT (PostgreSQL 15+) lets sales without a payment keep a NULL payment_id_y.
+
+-- Create Sales Mart Table
+-- Range-partitioned by order_date: the loader creates one partition per month
+-- (sales_mart_pYYYY_MM) and a full rebuild swaps each one in whole. A unique key on a
+-- partitioned table must contain the partition column, hence order_date in the key.
+-- An existing unpartitioned sales_mart must be dropped once to pick this up.
+CREATE TABLE IF NOT EXISTS sales_mart (
+    order_id VARCHAR(50),
+    customer_id VARCHAR(50),
+    product_id VARCHAR(50),
+    order_date TIMESTAMP NOT NULL,
+    total_amount NUMERIC,
+    payment_id_x VARCHAR(50),
+    name_x VARCHAR(255),
+    gender VARCHAR(50),
+    email VARCHAR(255),
+    phone_number VARCHAR(50),
+    signup_date TIMESTAMP,
+    last_active_date TIMESTAMP,
+    location VARCHAR(255),
+    churn_status VARCHAR(50),
+    name_y VARCHAR(255),
+    category VARCHAR(255),
+    price NUMERIC,
+    stock_quantity NUMERIC,
+    supplier VARCHAR(255),
+    rating NUMERIC,
+    reviews_count NUMERIC,
+    payment_id_y VARCHAR(50),
+    user_id VARCHAR(50),
+    payment_date TIMESTAMP,
+    payment_method VARCHAR(50),
+    total_paid NUMERIC,
+    transaction_fee NUMERIC,
+    payment_status VARCHAR(50),
+    revenue NUMERIC,
+    churned BOOLEAN,
+    CONSTRAINT sales_mart_key UNIQUE NULLS NOT DISTINCT (order_id, payment_id_y, order_date)
+) PARTITION BY RANGE (order_date);
+
+-- Create Marketing Mart Table (no natural key: refreshed in full every run)
+CREATE TABLE IF NOT EXISTS marketing_mart (
+    ad_source VARCHAR(255),
+    campaign_name VARCHAR(255),
+    clicks NUMERIC,
+    conversions NUMERIC,
+    cost_per_click NUMERIC,
+    return_on_ad_spend NUMERIC,
+    cost NUMERIC
+);
+
+-- Create Support Mart Table
+CREATE TABLE IF NOT EXISTS support_mart (
+    ticket_id VARCHAR(50) PRIMARY KEY,
+    customer_id VARCHAR(50),
+    issue_type VARCHAR(255),
+    response_time VARCHAR(50),
+    resolution_status VARCHAR(50),
+    feedback_rating NUMERIC
+);
+
+-- ---------------------
+-- Summary Marts (scripts/summary_marts.py)
+-- ---------------------
+-- Pre-aggregated for the dashboard. Full runs replace them whole; incremental runs
+-- re-aggregate the sales days they touched (upsert, replacing each day's groups).
+
+-- Daily sales by category
+CREATE TABLE IF NOT EXISTS sales_daily_by_category (
+    order_date DATE NOT NULL,
+    category VARCHAR(255),
+    orders INTEGER,
+    sales_amount NUMERIC,
+    payments INTEGER,
+    amount_paid NUMERIC,
+    CONSTRAINT sales_daily_by_category_key UNIQUE NULLS NOT DISTINCT (order_date, category)
+);
+
+-- Daily sales by location
+CREATE TABLE IF NOT EXISTS sales_daily_by_location (
+    order_date DATE NOT NULL,
+    location VARCHAR(255),
+    orders INTEGER,
+    sales_amount NUMERIC,
+    payments INTEGER,
+    amount_paid NUMERIC,
+    CONSTRAINT sales_daily_by_location_key UNIQUE NULLS NOT DISTINCT (order_date, location)
+);
+
+-- Daily sales by payment method
+CREATE TABLE IF NOT EXISTS sales_daily_by_payment_method (
+    order_date DATE NOT NULL,
+    payment_method VARCHAR(50),
+    orders INTEGER,
+    sales_amount NUMERIC,
+    payments INTEGER,
+    amount_paid NUMERIC,
+    CONSTRAINT sales_daily_by_payment_method_key UNIQUE NULLS NOT DISTINCT (order_date, payment_method)
+);
+
+-- Campaign cost versus conversions by ad source
+CREATE TABLE IF NOT EXISTS campaign_summary (
+    ad_source VARCHAR(255),
+    campaigns INTEGER,
+    ads INTEGER,
+    clicks NUMERIC,
+    conversions NUMERIC,
+    cost NUMERIC,
+    cost_per_conversion NUMERIC,
+    CONSTRAINT campaign_summary_key UNIQUE NULLS NOT DISTINCT (ad_source)
+);
+
+-- Support tickets and feedback by issue type and resolution status
+CREATE TABLE IF NOT EXISTS support_summary (
+    issue_type VARCHAR(255),
+    resolution_status VARCHAR(50),
+    tickets INTEGER,
+    avg_feedback_rating NUMERIC,
+    CONSTRAINT support_summary_key UNIQUE NULLS NOT DISTINCT (issue_type, resolution_status)
+);
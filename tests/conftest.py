@@ -0,0 +1,43 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# The scripts are run as `python -m scripts.<module>` from the project root, not installed
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+@pytest.fixture
+def pg_conn():
+    """A psycopg2 connection to ETL_TEST_DB_URL whose work is rolled back after the test.
+
+    Tests using it are skipped unless the variable names a PostgreSQL 15+ database.
+    """
+    db_url = os.environ.get("ETL_TEST_DB_URL")
+    if not db_url:
+        pytest.skip("set ETL_TEST_DB_URL to run the tests against PostgreSQL")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(db_url)
+    conn = engine.raw_connection()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+        engine.dispose()
+
+@pytest.fixture(scope="session")
+def source_dir(tmp_path_factory):
+    """A small generateData.py data set, with its missing values and duplicates, as a path ending in a separator."""
+    pytest.importorskip("faker")
+    from generateData import DataGenerator
+
+    data_dir = tmp_path_factory.mktemp("data")
+    DataGenerator(output_dir=str(data_dir), seed=7, chunk_size=1000).generate_all(
+        num_customers=300, num_products=60, num_sales=3000, num_ads=200, num_tickets=400
+    )
+    return os.path.join(str(data_dir), "")
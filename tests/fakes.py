@@ -0,0 +1,78 @@
+# tests/fakes.py
+#
+# Stand-ins for a psycopg2 connection, recording every statement and COPY payload
+# instead of running them.
+
+import csv
+import io
+
+class CopyFailed(Exception):
+    pass
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.pending.append(("execute", sql, params))
+        if "FROM pg_inherits" in sql:
+            self._rows = [(name,) for name in sorted(self.conn.partitions)]
+
+    def copy_expert(self, sql, file):
+        payload = file.read()
+        self.conn.pending.append(("copy", sql, payload.decode() if isinstance(payload, bytes) else payload))
+        if self.conn.fail_on_copy == len(self.conn.copies):
+            raise CopyFailed(f"COPY {len(self.conn.copies)} failed")
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """Records statements and COPY payloads; a `with` block commits or rolls them back
+    as a whole, like a psycopg2 connection."""
+
+    def __init__(self, partitions=(), fail_on_copy=None):
+        self.partitions = set(partitions)
+        self.fail_on_copy = fail_on_copy
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+
+    @property
+    def copies(self):
+        return [(sql, payload) for kind, sql, payload in self.pending if kind == "copy"]
+
+    @property
+    def statements(self):
+        return [sql for kind, sql, _ in self.pending if kind == "execute"]
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+        self.rollbacks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+def copied_rows(payload):
+    return list(csv.reader(io.StringIO(payload)))
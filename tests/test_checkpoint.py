@@ -0,0 +1,95 @@
+# tests/test_checkpoint.py
+#
+# Resuming a failed run from its checkpoints (scripts/checkpoint.py): finished stages
+# are read back instead of rebuilt, committed load batches are skipped, and the run ID
+# only stays the same while the inputs do.
+
+import pandas as pd
+import pytest
+
+from scripts.checkpoint import RunCheckpoint, checkpointed, input_run_id
+from scripts.load_to_postgres import PostgresLoader
+from scripts.schemas import STRING_DTYPE
+
+def cleaned_tables():
+    # IDs typed as extract reads them, so they round-trip through Parquet unchanged
+    return {
+        "customers": pd.DataFrame(
+            {
+                "customer_id": pd.array(["C1", "C2"], dtype=STRING_DTYPE),
+                "signup_date": pd.to_datetime(["2024-01-01", None]),
+            }
+        ),
+        "products": pd.DataFrame({"product_id": pd.array(["P1"], dtype=STRING_DTYPE), "price": [9.5]}),
+    }
+
+def test_finished_stage_is_read_back_on_resume(tmp_path):
+    builds = []
+
+    def clean():
+        builds.append("clean")
+        return cleaned_tables()
+
+    first = RunCheckpoint(str(tmp_path))
+    checkpointed(first, "clean", clean)
+
+    resumed = RunCheckpoint(str(tmp_path))
+    frames = checkpointed(resumed, "clean", clean)
+    assert builds == ["clean"]
+    assert resumed.stage_info("clean")["frames"] == {"customers": 2, "products": 1}
+    for name, expected in cleaned_tables().items():
+        pd.testing.assert_frame_equal(frames[name], expected)
+
+def test_failed_stage_is_rebuilt_on_resume(tmp_path):
+    def failing():
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        checkpointed(RunCheckpoint(str(tmp_path)), "clean", failing)
+
+    resumed = RunCheckpoint(str(tmp_path))
+    assert not resumed.stage_done("clean")
+    assert set(checkpointed(resumed, "clean", cleaned_tables)) == {"customers", "products"}
+
+def test_without_checkpoint_every_stage_is_built():
+    assert set(checkpointed(None, "clean", cleaned_tables)) == {"customers", "products"}
+
+def test_committed_batches_survive_and_merge_across_writers(tmp_path):
+    # Two tasks of one run, each with its own view of the state file
+    task_a = RunCheckpoint(str(tmp_path))
+    task_b = RunCheckpoint(str(tmp_path))
+    task_a.mark_loaded("sales_mart", "partition_00000")
+    task_b.mark_loaded("sales_mart", "partition_00001")
+    task_b.mark_loaded("marketing_mart")
+
+    resumed = RunCheckpoint(str(tmp_path))
+    assert resumed.loaded_batches("sales_mart") == {"partition_00000", "partition_00001"}
+    assert resumed.batch_loaded("marketing_mart")
+    assert not resumed.batch_loaded("sales_mart", "partition_00002")
+
+def test_loader_skips_batches_committed_before_the_failure(tmp_path):
+    checkpoint = RunCheckpoint(str(tmp_path))
+    checkpoint.mark_loaded("sales_mart", "partition_00000")
+
+    # Nothing is sent: the engine never connects to this unreachable database
+    with PostgresLoader("postgresql://etl@unreachable.invalid/etl", checkpoint=checkpoint) as loader:
+        assert loader.load(pd.DataFrame({"order_id": ["O1"]}), "sales_mart", batch="partition_00000") is None
+
+def test_run_id_changes_with_inputs_and_options(tmp_path):
+    source = tmp_path / "sales_transactions.csv"
+    source.write_text("order_id\nO1\n")
+    sources = {"sales_transactions": [str(source)]}
+
+    run_id = input_run_id("streaming", sources, chunksize=1000)
+    assert run_id.startswith("streaming-")
+    assert input_run_id("streaming", sources, chunksize=1000) == run_id
+    assert input_run_id("streaming", sources, chunksize=2000) != run_id
+
+    source.write_text("order_id\nO1\nO2\n")
+    assert input_run_id("streaming", sources, chunksize=1000) != run_id
+
+def test_discard_removes_the_run(tmp_path):
+    checkpoint = RunCheckpoint.for_run("manual__2024-01-01T00:00:00+00:00", str(tmp_path))
+    checkpointed(checkpoint, "clean", cleaned_tables)
+    checkpoint.discard()
+    assert list(tmp_path.iterdir()) == []
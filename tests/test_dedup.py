@@ -0,0 +1,60 @@
+# tests/test_dedup.py
+#
+# Hashed-key deduplication (scripts/dedup.py): whole tables, and tables streamed in
+# chunks, where a duplicate may arrive chunks after its first occurrence.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.dedup import ChunkDeduplicator, deduplicate, merge_sorted
+
+def payments():
+    # Duplicates within and across the 3-row chunks below, and rows without a key
+    return pd.DataFrame(
+        {
+            "payment_id": ["PY1", "PY2", "PY1", "PY3", None, "PY2", None, "PY4", "PY3", "PY5"],
+            "total_paid": [1.0, 2.0, 9.0, 3.0, 4.0, 2.0, 4.0, 5.0, 3.0, 6.0],
+        }
+    )
+
+def test_deduplicate_keeps_the_first_row_of_each_key():
+    df = deduplicate(payments(), "payments")
+    assert df["payment_id"].tolist() == ["PY1", "PY2", "PY3", None, None, "PY4", "PY5"]
+    assert df["total_paid"].tolist() == [1.0, 2.0, 3.0, 4.0, 4.0, 5.0, 6.0]
+
+def test_deduplicate_without_keys_compares_whole_rows():
+    df = pd.DataFrame({"campaign": ["A", "A", "A"], "clicks": [1, 1, 2]})
+    assert deduplicate(df, "marketing_ads")["clicks"].tolist() == [1, 2]
+
+def stream(deduplicator, df, chunksize):
+    return pd.concat(
+        [deduplicator.drop_seen(df.iloc[start:start + chunksize]) for start in range(0, len(df), chunksize)]
+    )
+
+@pytest.mark.parametrize("chunksize", [1, 3, 4, 10])
+def test_chunked_dedup_matches_whole_table_dedup(chunksize):
+    deduplicator = ChunkDeduplicator("payments")
+    pd.testing.assert_frame_equal(stream(deduplicator, payments(), chunksize), deduplicate(payments(), "payments"))
+    assert deduplicator.duplicates == 3
+
+def test_chunked_dedup_spills_its_seen_set(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"payment_id": rng.integers(0, 2000, 5000).astype(str)})
+    # A buffer smaller than a chunk, so every chunk is checked against spilled ranges
+    deduplicator = ChunkDeduplicator("payments", directory=str(tmp_path), partitions=4, buffer_rows=100)
+    pd.testing.assert_frame_equal(stream(deduplicator, df, 500), deduplicate(df, "payments"))
+    assert sorted(p.name for p in tmp_path.glob("*.npy")) == [f"part-{p:05d}.npy" for p in range(4)]
+
+def test_saved_seen_set_carries_over_to_the_next_run(tmp_path):
+    first = ChunkDeduplicator("payments", directory=str(tmp_path))
+    first.drop_seen(payments().iloc[:4])
+    first.save()
+
+    second = ChunkDeduplicator("payments", directory=str(tmp_path))
+    assert second.drop_seen(payments().iloc[4:])["payment_id"].tolist() == [None, None, "PY4", "PY5"]
+
+def test_merge_sorted_merges_two_sorted_runs():
+    a = np.array([1, 4, 9], dtype=np.uint64)
+    b = np.array([2, 3, 10], dtype=np.uint64)
+    assert merge_sorted(a, b).tolist() == [1, 2, 3, 4, 9, 10]
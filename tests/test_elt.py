@@ -0,0 +1,27 @@
+# tests/test_elt.py
+#
+# The SQL the ELT mode runs (scripts/elt.py, scripts/sql_schema.py): raw table DDL
+# with its ALTER TABLE extensions, and the churn windows of the sales mart view.
+
+from scripts.customer_activity import CHURN_WINDOWS
+from scripts.elt import marts_sql
+from scripts.pipeline_layout import SOURCE_TABLES
+from scripts.sql_schema import parse_tables, split_statements
+
+def test_raw_tables_are_created_then_widened():
+    tables = parse_tables()
+    for table_name in SOURCE_TABLES:
+        assert tables[table_name]["ddl"].startswith(f"CREATE TABLE IF NOT EXISTS {table_name} (")
+        assert all(stmt.startswith(f"ALTER TABLE {table_name}\n") for stmt in tables[table_name]["alter"])
+    assert "ADD COLUMN IF NOT EXISTS gender" in tables["customers"]["alter"][0]
+    assert tables["sales_mart"]["alter"] == []
+
+def sales_mart_view(sql):
+    [view] = [stmt for stmt in split_statements(sql) if "sales_mart_mv AS" in stmt]
+    return view
+
+def test_sales_mart_view_has_a_column_per_churn_window():
+    view = sales_mart_view(marts_sql())
+    for days in CHURN_WINDOWS:
+        assert f"i.idle_time > INTERVAL '{days} days' AS churned_{days}d" in view
+    assert "INTERVAL '45 days' AS churned," in sales_mart_view(marts_sql(churn_window_days=45))
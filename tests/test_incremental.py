@@ -0,0 +1,116 @@
+# tests/test_incremental.py
+#
+# Watermarks of incremental runs (scripts/incremental.py): ID ordering by numeric
+# suffix, and the source files a run may skip as unchanged.
+
+import os
+
+import pandas as pd
+import pytest
+
+from scripts.incremental import (
+    WatermarkStore,
+    extract_incremental_batch,
+    file_fingerprints,
+    latest_mark,
+    select_new_rows,
+)
+
+# ---------------------
+# ID watermarks
+# ---------------------
+
+def tickets(*ids):
+    return pd.DataFrame({"ticket_id": list(ids)})
+
+def test_id_watermark_orders_by_numeric_suffix(tmp_path):
+    store = WatermarkStore(tmp_path)
+    store.update("customer_support", "T9999")
+    # "T10000" < "T9999" as strings; the mark must still advance
+    store.update("customer_support", "T10000")
+    assert store.get("customer_support") == "T10000"
+    store.update("customer_support", "T9998")
+    assert store.get("customer_support") == "T10000"
+
+def test_new_ids_are_past_the_watermark_by_number(tmp_path):
+    store = WatermarkStore(tmp_path)
+    store.update("customer_support", "T9999")
+    new = select_new_rows(tickets("T9998", "T9999", "T10000", "T10001", None), "customer_support", store)
+    assert new["ticket_id"].tolist() == ["T10000", "T10001"]
+
+def test_latest_id_mark_is_the_highest_number():
+    assert latest_mark(tickets("T9999", "T10000", "T998"), "customer_support") == "T10000"
+    assert latest_mark(tickets(), "customer_support") is None
+
+def test_id_watermark_without_numeric_suffix_is_rejected(tmp_path):
+    store = WatermarkStore(tmp_path)
+    store.update("customer_support", "T1")
+    with pytest.raises(ValueError):
+        store.update("customer_support", "TX")
+
+def test_watermarks_survive_a_save(tmp_path):
+    store = WatermarkStore(tmp_path)
+    store.update("sales_transactions", pd.Timestamp("2024-03-01"))
+    store.update("customer_support", "T10000")
+    store.save()
+
+    reloaded = WatermarkStore(tmp_path)
+    assert reloaded.get("sales_transactions") == pd.Timestamp("2024-03-01")
+    assert reloaded.get("customer_support") == "T10000"
+
+# ---------------------
+# Changed source files
+# ---------------------
+
+def test_recorded_files_are_unchanged_until_touched(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("order_id\nO1\n")
+    store = WatermarkStore(tmp_path / "state")
+    assert store.changed_files([str(path)]) == [str(path)]
+
+    store.record_files(file_fingerprints([str(path)]))
+    assert store.changed_files([str(path)]) == []
+
+    path.write_text("order_id\nO1\nO2\n")
+    assert store.changed_files([str(path)]) == [str(path)]
+
+SALES_HEADER = "order_id,customer_id,product_id,order_date,total_amount,payment_id\n"
+PAYMENTS_HEADER = "payment_id,order_id,user_id,payment_date,payment_method,total_paid,transaction_fee,payment_status\n"
+SUPPORT_HEADER = "ticket_id,customer_id,issue_type,response_time,resolution_status,feedback_rating\n"
+
+def sale(order, order_date):
+    return f"R{order},C1,P1,{order_date},10.0,PY{order}\n"
+
+def payment(order, payment_date):
+    return f"PY{order},R{order},U1,{payment_date},Cash,10.0,0.5,Completed\n"
+
+def write_sources(data_dir, old_sales, new_sales, payments):
+    # Two daily sales drops, of which the older one was read by the last run
+    (data_dir / "sales_transactions_2024-01-01.csv").write_text(SALES_HEADER + "".join(old_sales))
+    (data_dir / "sales_transactions_2024-01-03.csv").write_text(SALES_HEADER + "".join(new_sales))
+    (data_dir / "payments.csv").write_text(PAYMENTS_HEADER + "".join(payments))
+    (data_dir / "customer_support.csv").write_text(SUPPORT_HEADER)
+
+def test_incremental_batch_skips_unchanged_files(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_sources(
+        data_dir,
+        old_sales=[sale(1, "2024-01-01"), sale(2, "2024-01-01")],
+        new_sales=[sale(3, "2024-01-03")],
+        payments=[payment(1, "2024-01-01"), payment(1, "2024-01-03"), payment(3, "2024-01-03")],
+    )
+    store = WatermarkStore(tmp_path / "state")
+    store.update("sales_transactions", pd.Timestamp("2024-01-03"))
+    store.update("payments", pd.Timestamp("2024-01-03"))
+    old_file = str(data_dir / "sales_transactions_2024-01-01.csv")
+    store.record_files(file_fingerprints([old_file]))
+
+    sales, payments, support, marks, fingerprints = extract_incremental_batch(store, str(data_dir) + os.sep)
+
+    # Order 3 is new; order 1, in the skipped file, is rebuilt for its new payment
+    assert sorted(sales["order_id"]) == ["R1", "R3"]
+    assert sorted(payments["payment_id"]) == ["PY1", "PY1", "PY3"]
+    assert support.empty
+    assert marks["sales_transactions"] == pd.Timestamp("2024-01-03")
+    assert os.path.abspath(old_file) in fingerprints
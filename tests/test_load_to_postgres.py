@@ -0,0 +1,105 @@
+# tests/test_load_to_postgres.py
+#
+# COPY FROM STDIN serialisation and staged loads of scripts/load_to_postgres.py,
+# against the fake connection of tests/fakes.py and, with ETL_TEST_DB_URL set,
+# against PostgreSQL.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import FakeConnection, copied_rows
+from scripts.load_to_postgres import copy_dataframe, copy_via_staging
+
+# ---------------------
+# COPY escaping
+# ---------------------
+
+def tricky_frame():
+    return pd.DataFrame(
+        {
+            "order_id": ["O1", "O2", "O3"],
+            "name": ['Smith, "Jr."', None, "two\nlines"],
+            "total_amount": [1.5, np.nan, 3.0],
+        }
+    )
+
+def test_copy_writes_nulls_as_unquoted_empty_fields():
+    conn = FakeConnection()
+    copy_dataframe(conn, tricky_frame(), "sales_mart")
+
+    [(sql, payload)] = conn.copies
+    assert sql == 'COPY "sales_mart" ("order_id", "name", "total_amount") FROM STDIN WITH (FORMAT csv)'
+    # FORMAT csv reads an unquoted empty field as NULL
+    assert payload.splitlines()[1] == "O2,,"
+
+def test_copy_quotes_delimiters_quotes_and_newlines():
+    conn = FakeConnection()
+    copy_dataframe(conn, tricky_frame(), "sales_mart")
+
+    [(_, payload)] = conn.copies
+    assert '"Smith, ""Jr."""' in payload
+    assert copied_rows(payload) == [
+        ["O1", 'Smith, "Jr."', "1.5"],
+        ["O2", "", ""],
+        ["O3", "two\nlines", "3.0"],
+    ]
+
+def test_copy_escapes_arrow_tables_the_same_way():
+    pa = pytest.importorskip("pyarrow")
+    conn = FakeConnection()
+    copy_dataframe(conn, pa.Table.from_pandas(tricky_frame(), preserve_index=False), "sales_mart")
+
+    [(_, payload)] = conn.copies
+    assert copied_rows(payload) == [
+        ["O1", 'Smith, "Jr."', "1.5"],
+        ["O2", "", ""],
+        ["O3", "two\nlines", "3"],
+    ]
+
+def test_copy_sends_one_copy_per_batch():
+    conn = FakeConnection()
+    assert copy_dataframe(conn, tricky_frame(), "sales_mart", batch_size=2) == 3
+    assert [len(copied_rows(payload)) for _, payload in conn.copies] == [2, 1]
+
+def test_copy_quotes_identifiers():
+    conn = FakeConnection()
+    copy_dataframe(conn, pd.DataFrame({'odd "col"': [1]}), 'odd "table"')
+
+    [(sql, _)] = conn.copies
+    assert sql.startswith('COPY "odd ""table""" ("odd ""col""") FROM STDIN')
+
+# ---------------------
+# Staged loads
+# ---------------------
+
+def test_staged_replace_truncates_and_inserts_in_place():
+    conn = FakeConnection()
+    assert copy_via_staging(conn, tricky_frame(), "support_mart", replace=True) == 3
+
+    assert conn.statements == [
+        'DROP TABLE IF EXISTS "support_mart__staging"',
+        'CREATE UNLOGGED TABLE "support_mart__staging" (LIKE "support_mart" INCLUDING ALL)',
+        'TRUNCATE "support_mart" RESTART IDENTITY',
+        'INSERT INTO "support_mart" ("order_id", "name", "total_amount") '
+        'SELECT "order_id", "name", "total_amount" FROM "support_mart__staging"',
+        'DROP TABLE "support_mart__staging"',
+    ]
+    [(copy_sql, _)] = conn.copies
+    assert copy_sql.startswith('COPY "support_mart__staging"')
+
+def test_staged_append_does_not_truncate():
+    conn = FakeConnection()
+    copy_via_staging(conn, tricky_frame(), "support_mart")
+    assert not any(sql.startswith("TRUNCATE") for sql in conn.statements)
+
+def test_staged_replace_keeps_dependent_views(pg_conn):
+    cur = pg_conn.cursor()
+    cur.execute("CREATE TEMP TABLE staged_target (order_id TEXT, name TEXT, total_amount NUMERIC)")
+    cur.execute("INSERT INTO staged_target VALUES ('O9', 'old', 9)")
+    cur.execute("CREATE TEMP VIEW staged_target_view AS SELECT order_id FROM staged_target")
+
+    copy_via_staging(pg_conn, tricky_frame(), "staged_target", replace=True)
+
+    cur.execute("SELECT order_id FROM staged_target_view ORDER BY 1")
+    assert [row[0] for row in cur.fetchall()] == ["O1", "O2", "O3"]
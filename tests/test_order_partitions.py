@@ -0,0 +1,62 @@
+# tests/test_order_partitions.py
+#
+# Streaming mode's spilled state (scripts/order_partitions.py): order_id partitions and
+# the payments fill statistics, checked against the whole-table computations.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.cleaning import CLEANING_SPECS, column_stats, drop_incomplete
+from scripts.order_partitions import OrderPartitions, SpilledColumnStats, partition_count
+
+SPEC = {
+    "required": ["payment_id"],
+    "fill": {},
+    "fill_stats": {"fee": "median", "amount": "mean"},
+    "fill_from": {},
+    "dates": [],
+}
+
+def payments(rows, seed):
+    rng = np.random.default_rng(seed)
+    fee = rng.integers(0, 50, rows).astype(float)
+    fee[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame(
+        {
+            "payment_id": [f"PY{i}" if i % 7 else None for i in range(rows)],
+            "order_id": [f"R{i % 97}" for i in range(rows)],
+            "fee": fee,
+            "amount": rng.random(rows) * 100,
+        }
+    )
+
+@pytest.mark.parametrize("rows", [999, 1000])
+def test_spilled_stats_match_whole_table_stats(tmp_path, rows):
+    # Odd and even counts of complete rows, ties across chunks
+    df = payments(rows, seed=rows)
+    stats = SpilledColumnStats(tmp_path, SPEC)
+    for start in range(0, rows, 128):
+        stats.add(df.iloc[start:start + 128])
+
+    expected = column_stats(drop_incomplete(df, SPEC), SPEC)
+    assert stats.stats()["fee"] == expected["fee"]
+    assert stats.stats()["amount"] == pytest.approx(expected["amount"])
+
+def test_spilled_stats_of_no_values_are_nan(tmp_path):
+    stats = SpilledColumnStats(tmp_path, CLEANING_SPECS["payments"])
+    assert all(pd.isna(value) for value in stats.stats().values())
+
+def test_partitions_keep_each_order_together_in_stream_order(tmp_path):
+    df = payments(500, seed=0)
+    order_partitions = OrderPartitions(str(tmp_path), partition_count(len(df), 200))
+    for start in range(0, len(df), 64):
+        order_partitions.write("payments", df.iloc[start:start + 64])
+
+    parts = [order_partitions.read("payments", p) for p in range(order_partitions.partitions)]
+    orders = [set(part["order_id"]) for part in parts]
+    assert sum(len(o) for o in orders) == df["order_id"].nunique()
+    restored = pd.concat(parts).sort_values("order_id", kind="stable")
+    pd.testing.assert_frame_equal(
+        restored.reset_index(drop=True), df.sort_values("order_id", kind="stable").reset_index(drop=True)
+    )
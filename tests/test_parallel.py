@@ -0,0 +1,35 @@
+# tests/test_parallel.py
+#
+# The process-pool transform (scripts/parallel.py) against serial transform_all: the
+# same marts, row for row, whatever order the partitions come back in.
+
+import pandas as pd
+
+from scripts.extract_data import extract_all_data
+from scripts.parallel import partition_positions, transform_all_parallel
+from scripts.transform_data import transform_all
+
+def sorted_rows(df):
+    # Rows as strings in a canonical order, missing values alike whatever their dtype
+    df = df.astype(object).where(df.notna(), None).astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+def test_parallel_transform_matches_serial(source_dir):
+    serial = transform_all(*extract_all_data(source_dir))
+    parallel = transform_all_parallel(*extract_all_data(source_dir), workers=2)
+
+    for name, expected, result in zip(["sales_mart", "marketing_mart", "support_mart"], serial, parallel):
+        assert list(result.columns) == list(expected.columns), name
+        pd.testing.assert_frame_equal(sorted_rows(result), sorted_rows(expected), obj=name)
+
+def test_partitions_split_rows_by_key_only():
+    keys = pd.Series(["O1", "O2", "O1", None, "O3", "O2"])
+    parts = partition_positions(keys, 3)
+
+    assert sorted(pos for part in parts for pos in part) == list(range(len(keys)))
+    for part in parts:
+        assert list(part) == sorted(part)
+    # Every row of an order lands in the same partition
+    partition_of = {pos: p for p, part in enumerate(parts) for pos in part}
+    assert partition_of[0] == partition_of[2]
+    assert partition_of[1] == partition_of[5]
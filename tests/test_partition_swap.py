@@ -0,0 +1,67 @@
+# tests/test_partition_swap.py
+#
+# swap_partitions, the full-rebuild load of the range-partitioned sales_mart, against
+# the fake connection of tests/fakes.py.
+
+import pandas as pd
+import pytest
+
+from fakes import CopyFailed, FakeConnection, copied_rows
+from scripts.load_to_postgres import swap_partitions
+
+def two_month_frame():
+    return pd.DataFrame(
+        {
+            "order_id": ["O1", "O2", "O3"],
+            "order_date": pd.to_datetime(["2024-01-05", "2024-02-10", "2024-01-20"]),
+        }
+    )
+
+def test_swap_partitions_replaces_each_month_it_has_rows_for():
+    conn = FakeConnection(partitions=["sales_mart_p2024_01", "sales_mart_p2023_12"])
+    with conn:
+        assert swap_partitions(conn, two_month_frame(), "sales_mart", "order_date") == 3
+
+    copies = [(sql.split(" (")[0], copied_rows(payload)) for kind, sql, payload in conn.committed if kind == "copy"]
+    assert copies == [
+        ('COPY "sales_mart_p2024_01__staging"', [["O1", "2024-01-05"], ["O3", "2024-01-20"]]),
+        ('COPY "sales_mart_p2024_02__staging"', [["O2", "2024-02-10"]]),
+    ]
+    statements = [sql for kind, sql, _ in conn.committed if kind == "execute"]
+    assert 'ALTER TABLE "sales_mart" DETACH PARTITION "sales_mart_p2024_01"' in statements
+    # February had no partition yet, and December is kept without replace_all
+    assert not any("DETACH PARTITION" in sql and "p2024_02" in sql for sql in statements)
+    assert not any("p2023_12" in sql for sql in statements)
+
+def test_swap_partitions_with_replace_all_drops_partitions_without_rows():
+    conn = FakeConnection(partitions=["sales_mart_p2023_12"])
+    swap_partitions(conn, two_month_frame(), "sales_mart", "order_date", replace_all=True)
+    assert conn.statements[-2:] == [
+        'ALTER TABLE "sales_mart" DETACH PARTITION "sales_mart_p2023_12"',
+        'DROP TABLE "sales_mart_p2023_12"',
+    ]
+
+def test_failed_partition_swap_is_rolled_back_as_a_whole():
+    conn = FakeConnection(partitions=["sales_mart_p2024_01", "sales_mart_p2024_02"], fail_on_copy=2)
+    with pytest.raises(CopyFailed), conn:
+        swap_partitions(conn, two_month_frame(), "sales_mart", "order_date")
+
+    # January was already swapped when February's COPY failed; swap_partitions never
+    # commits on its own, so the caller's rollback undoes January's swap as well
+    assert conn.rollbacks == 1
+    assert conn.committed == []
+
+def test_failed_partition_swap_stops_before_touching_the_old_partition():
+    conn = FakeConnection(partitions=["sales_mart_p2024_01", "sales_mart_p2024_02"], fail_on_copy=2)
+    with pytest.raises(CopyFailed):
+        swap_partitions(conn, two_month_frame(), "sales_mart", "order_date")
+
+    assert 'ALTER TABLE "sales_mart" DETACH PARTITION "sales_mart_p2024_01"' in conn.statements
+    assert not any("DETACH PARTITION" in sql and "p2024_02" in sql for sql in conn.statements)
+
+def test_swap_partitions_refuses_rows_without_a_partition_value():
+    df = pd.DataFrame({"order_id": ["O1"], "order_date": [pd.NaT]})
+    conn = FakeConnection()
+    with pytest.raises(ValueError, match="no order_date"):
+        swap_partitions(conn, df, "sales_mart", "order_date")
+    assert conn.copies == []
@@ -0,0 +1,26 @@
+# tests/test_polars_backend.py
+#
+# The Polars backend (scripts/polars_backend.py) against the pandas transform_all:
+# the same marts from the same extracted frames.
+
+import pandas as pd
+import pytest
+
+from scripts.extract_data import extract_all_data
+from scripts.polars_backend import transform_all_polars
+from scripts.transform_data import transform_all
+
+def sorted_rows(df):
+    # Rows as strings in a canonical order, missing values alike whatever their dtype
+    df = df.astype(object).where(df.notna(), None).astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+def test_polars_transform_matches_pandas(source_dir):
+    pytest.importorskip("polars")
+    expected_marts = transform_all(*extract_all_data(source_dir))
+    polars_marts = transform_all_polars(*extract_all_data(source_dir))
+
+    for name, expected, table in zip(["sales_mart", "marketing_mart", "support_mart"], expected_marts, polars_marts):
+        result = table.to_pandas()
+        assert list(result.columns) == list(expected.columns), name
+        pd.testing.assert_frame_equal(sorted_rows(result), sorted_rows(expected), obj=name)
@@ -0,0 +1,94 @@
+# tests/test_staging_cache.py
+#
+# When the Parquet staging cache (scripts/staging_cache.py) re-parses a source CSV:
+# on a size change, on an mtime change with new content, on a schema change, and not
+# on a touch that leaves the content alone.
+
+import os
+
+import pytest
+
+import scripts.staging_cache as staging_cache
+from scripts.staging_cache import StagingCache
+
+HEADER = "ticket_id,customer_id,issue_type,response_time,resolution_status,feedback_rating\n"
+
+@pytest.fixture
+def parses(monkeypatch):
+    """The paths read_table parsed, in order."""
+    parsed = []
+    read_table = staging_cache.read_table
+
+    def counting_read_table(path, table_name, **kwargs):
+        parsed.append(path)
+        return read_table(path, table_name, **kwargs)
+
+    monkeypatch.setattr(staging_cache, "read_table", counting_read_table)
+    return parsed
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "customer_support.csv"
+    path.write_text(HEADER + "T1,C1,Billing,2h,Resolved,4.0\n")
+    return str(path)
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_unchanged_source_is_read_from_parquet(tmp_path, source, parses):
+    StagingCache(str(tmp_path / "stg")).read(source, "customer_support")
+    df = StagingCache(str(tmp_path / "stg")).read(source, "customer_support")
+    assert parses == [source]
+    assert df["ticket_id"].tolist() == ["T1"]
+
+def test_size_change_reparses(tmp_path, source, parses):
+    cache = StagingCache(str(tmp_path / "stg"))
+    cache.read(source, "customer_support")
+    with open(source, "a") as f:
+        f.write("T2,C2,Delivery,1h,Pending,3.0\n")
+
+    assert cache.read(source, "customer_support")["ticket_id"].tolist() == ["T1", "T2"]
+    assert len(parses) == 2
+
+def test_touched_source_with_same_content_is_not_reparsed(tmp_path, source, parses):
+    cache = StagingCache(str(tmp_path / "stg"))
+    cache.read(source, "customer_support")
+    set_mtime(source, os.stat(source).st_mtime_ns + 10**9)
+
+    cache.read(source, "customer_support")
+    assert len(parses) == 1
+    # The new mtime is remembered, so the next check does not hash the file again
+    assert StagingCache(str(tmp_path / "stg")).manifest["customer_support"]["mtime_ns"] == os.stat(source).st_mtime_ns
+
+def test_same_size_new_content_reparses(tmp_path, source, parses):
+    cache = StagingCache(str(tmp_path / "stg"))
+    cache.read(source, "customer_support")
+    mtime_ns = os.stat(source).st_mtime_ns
+    with open(source, "w") as f:
+        f.write(HEADER + "T9,C1,Billing,2h,Resolved,4.0\n")
+    set_mtime(source, mtime_ns + 10**9)
+
+    assert cache.read(source, "customer_support")["ticket_id"].tolist() == ["T9"]
+    assert len(parses) == 2
+
+def test_schema_or_engine_change_reparses(tmp_path, source, parses, monkeypatch):
+    cache = StagingCache(str(tmp_path / "stg"))
+    cache.read(source, "customer_support")
+    cache.read(source, "customer_support", engine="python")
+    assert len(parses) == 2
+
+    schema = {**staging_cache.TABLE_SCHEMAS["customer_support"], "categorical": []}
+    monkeypatch.setitem(staging_cache.TABLE_SCHEMAS, "customer_support", schema)
+    cache.read(source, "customer_support", engine="python")
+    assert len(parses) == 3
+
+def test_read_matching_filters_the_staged_copy(tmp_path, source, parses):
+    with open(source, "a") as f:
+        f.write("T2,C2,Delivery,1h,Pending,3.0\nT3,C3,Delivery,1h,Pending,3.0\n")
+    cache = StagingCache(str(tmp_path / "stg"))
+    cache.read(source, "customer_support")
+
+    matching = cache.read_matching(source, "customer_support", "customer_id", ["C3", "C1"])
+    assert matching["ticket_id"].tolist() == ["T1", "T3"]
+    assert cache.read_matching(source, "customer_support", "customer_id", []).empty
+    assert len(parses) == 1
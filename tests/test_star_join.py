@@ -0,0 +1,56 @@
+# tests/test_star_join.py
+#
+# star_join (scripts/star_join.py) against the chained DataFrame.merge calls it
+# replaced in build_sales_mart: same rows, order, column names and values.
+
+import numpy as np
+import pandas as pd
+
+from scripts.star_join import star_join
+
+def chained_merge(fact, dimensions):
+    for _, frame, key in dimensions:
+        fact = fact.merge(frame, on=key, how="left")
+    return fact
+
+def test_star_join_matches_chained_merge_on_generated_data(source_dir):
+    # Raw tables: duplicated dimension keys repeat fact rows, missing keys match nothing
+    tables = {
+        name: pd.read_csv(f"{source_dir}{name}.csv")
+        for name in ("sales_transactions", "customers", "products", "payments")
+    }
+    dimensions = [
+        ("customers", tables["customers"], "customer_id"),
+        ("products", tables["products"], "product_id"),
+        ("payments", tables["payments"], "order_id"),
+    ]
+    expected = chained_merge(tables["sales_transactions"], dimensions)
+    assert len(expected) > len(tables["sales_transactions"])
+
+    pd.testing.assert_frame_equal(star_join(tables["sales_transactions"], dimensions), expected)
+
+def test_star_join_repeats_and_misses_like_merge():
+    fact = pd.DataFrame({"order_id": ["O1", "O2", "O4", "O3"], "name": ["a", "b", "c", "d"]})
+    payments = pd.DataFrame({"order_id": ["O2", "O1", "O2"], "name": ["p", "q", "r"], "paid": [1.0, 2.0, 3.0]})
+    dimensions = [("payments", payments, "order_id")]
+
+    result = star_join(fact, dimensions)
+    pd.testing.assert_frame_equal(result, chained_merge(fact, dimensions))
+    assert result.columns.tolist() == ["order_id", "name_x", "name_y", "paid"]
+
+def test_star_join_never_matches_missing_keys():
+    # Unlike merge, which pairs NaN keys. After cleaning, one side of each sales_mart
+    # join has no missing keys, so the two agree there
+    fact = pd.DataFrame({"order_id": ["O1", None]})
+    payments = pd.DataFrame({"order_id": [None, "O1"], "paid": [1.0, 2.0]})
+
+    result = star_join(fact, [("payments", payments, "order_id")])
+    assert result["paid"].tolist()[0] == 2.0
+    assert np.isnan(result["paid"].tolist()[1])
+
+def test_star_join_projects_and_renames():
+    fact = pd.DataFrame({"order_id": ["O1", "O2"], "customer_id": ["C1", "C2"]})
+    customers = pd.DataFrame({"customer_id": ["C2", "C1"], "name": ["Bo", "Al"]})
+
+    result = star_join(fact, [("customers", customers, "customer_id")], {"order": "order_id", "customer": "name"})
+    assert result.to_dict("list") == {"order": ["O1", "O2"], "customer": ["Al", "Bo"]}